@@ -0,0 +1,97 @@
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections
+
+CATALOG_READ_PATH = re.compile(
+    r'^/api/v1/(genres|categories|titles(/\d+)?|titles/\d+/reviews)/$'
+)
+
+
+class CatalogASGIHandler(ASGIHandler):
+    """
+    ASGI handler whose sync views run in bounded thread pools.
+
+    Reading the request body and writing the response stay on the event
+    loop, so a slow client holds a coroutine, not a thread; only the parts
+    of streaming responses are produced in the pool, as they may query.
+    Hot catalog reads (titles list and detail, genres, categories, reviews
+    list) get their own pool, which writes, auth and exports cannot
+    exhaust.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.catalog_executor = ThreadPoolExecutor(
+            max_workers=settings.ASGI_CATALOG_THREADS,
+            thread_name_prefix='catalog',
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.ASGI_THREADS, thread_name_prefix='asgi',
+        )
+
+    def is_catalog_read(self, request):
+        return (request.method in ('GET', 'HEAD')
+                and CATALOG_READ_PATH.match(request.path_info) is not None)
+
+    def get_response_in_thread(self, request):
+        # Pool threads outlive requests: release their DB connections the
+        # way request_started/request_finished do for the WSGI handler.
+        close_old_connections()
+        try:
+            return super().get_response(request)
+        finally:
+            close_old_connections()
+
+    def next_part(self, parts):
+        try:
+            return next(parts, None)
+        finally:
+            close_old_connections()
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            await super().send_response(response, send)
+            return
+        # Streaming bodies may query the database while they are iterated
+        # (exports walk their tables chunk by chunk), which is not allowed
+        # on the event loop: advance the iterator in the pool instead.
+        headers = [(header.encode('ascii'), value.encode('latin1'))
+                   for header, value in response.items()]
+        headers.extend(
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+            for cookie in response.cookies.values()
+        )
+        await send({'type': 'http.response.start',
+                    'status': response.status_code, 'headers': headers})
+        loop = asyncio.get_running_loop()
+        parts = iter(response)
+        try:
+            while True:
+                part = await loop.run_in_executor(self.executor,
+                                                  self.next_part, parts)
+                if part is None:
+                    break
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({'type': 'http.response.body', 'body': chunk,
+                                'more_body': True})
+            await send({'type': 'http.response.body'})
+        finally:
+            await loop.run_in_executor(self.executor, response.close)
+
+    async def get_response(self, request):
+        executor = (self.catalog_executor if self.is_catalog_read(request)
+                    else self.executor)
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, self.get_response_in_thread, request
+        )
+
+
+def get_asgi_application():
+    import django
+
+    django.setup(set_prefix=False)
+    return CatalogASGIHandler()
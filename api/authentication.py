@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+
+from .metrics import record_cache_lookup
+
+User = get_user_model()
+
+# Claims embedded by get_tokens_for_user, enough for the permission classes.
+TOKEN_CLAIMS = ('username', 'role', 'is_staff')
+USER_FIELDS = ('id', 'username', 'role', 'is_staff', 'is_superuser',
+               'is_active')
+
+
+class UserCache:
+    """Thread-safe bounded LRU of `USER_FIELDS` values keyed by user id."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            expires, values = entry
+            if expires < time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return values
+
+    def set(self, user_id, values, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        with self.lock:
+            self.entries[user_id] = (time.monotonic() + ttl, values)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserCache(
+    getattr(settings, 'JWT_USER_CACHE_SIZE', 0),
+    getattr(settings, 'JWT_USER_CACHE_TTL', 60),
+)
+
+
+def token_lifetime():
+    """Seconds a token issued now may be used, refreshes included."""
+    return max(api_settings.ACCESS_TOKEN_LIFETIME,
+               api_settings.REFRESH_TOKEN_LIFETIME).total_seconds()
+
+
+def remember_user(user, deleted=False):
+    """
+    Caches the saved state of `user` for as long as tokens issued before
+    the change can be used, so that it overrides their claims: a role
+    change or deactivation takes effect at once in this process.
+    """
+    if not user_cache.enabled:
+        return
+    values = {name: getattr(user, name) for name in USER_FIELDS}
+    if deleted:
+        values['is_active'] = False
+    user_cache.set(user.pk, values, token_lifetime())
+
+
+def add_user_claims(token, user):
+    for claim in TOKEN_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def user_from_values(values):
+    """Builds a `User` with only `values` loaded, other fields are deferred
+    and fetched on access, and `save()` writes back only the loaded ones."""
+    field_names = [field.attname for field in User._meta.concrete_fields
+                   if field.attname in values]
+    return User.from_db(DEFAULT_DB_ALIAS, field_names,
+                        [values[name] for name in field_names])
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Resolves the user without a query per request, from the claims written
+    by `get_tokens_for_user`; other fields stay deferred. When the LRU
+    cache is enabled (JWT_USER_CACHE_SIZE > 0), a user saved by this
+    process since (see `remember_user`) is taken from the cache instead.
+
+    Tokens without those claims are resolved through the cache, then the
+    database.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+
+        values = user_cache.get(user_id) if user_cache.enabled else None
+        if values is not None:
+            record_cache_lookup('jwt_user', True)
+        elif all(claim in validated_token for claim in TOKEN_CLAIMS):
+            values = {'id': user_id, 'is_active': True}
+            values.update(
+                (claim, validated_token[claim]) for claim in TOKEN_CLAIMS
+            )
+        elif user_cache.enabled:
+            record_cache_lookup('jwt_user', False)
+            values = User.objects.filter(pk=user_id).values(
+                *USER_FIELDS
+            ).first()
+            if values is None:
+                raise AuthenticationFailed(_('User not found'),
+                                           code='user_not_found')
+            user_cache.set(user_id, values)
+        else:
+            return super().get_user(validated_token)
+
+        if not values['is_active']:
+            raise AuthenticationFailed(_('User is inactive'),
+                                       code='user_inactive')
+        return user_from_values(values)
@@ -0,0 +1,320 @@
+import gc
+import math
+import statistics
+import time
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import (CaptureQueriesContext, override_settings,
+                               setup_test_environment,
+                               teardown_test_environment)
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .compiled import compile_serializer
+from .exports import EXPORT_ROWS
+from .leaderboards import BOARDS
+from .models import Comment, Review, Title, User
+from .serializers import (CommentSerializer, ReviewSerializer,
+                          TitleReadSerializer)
+from .urls import v1_router
+from .utils import issue_confirmation_code
+
+PERCENTILES = (50, 95, 99)
+# Stats kept in the committed baseline: latencies depend on the machine,
+# query counts and response sizes only on the code and the seed.
+BASELINE_KEYS = ('queries', 'bytes')
+# Latency keys compared against the baseline; the tails of a short run are
+# too noisy to gate on and are only recorded for trend tracking.
+COMPARED_LATENCIES = ('p50_ms', )
+# Latency differences below this many milliseconds are never regressions.
+LATENCY_FLOOR_MS = 2.0
+# Allowed response size growth; sizes barely vary for a fixed seed.
+BYTES_TOLERANCE = 0.1
+
+# A cache private to this process: benchmark data must never reach, nor
+# clear, a cache shared with the workers.
+SCRATCH_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yamdb-scratch',
+    }
+}
+
+# `data` is a dict, or a callable preparing a fresh body outside the timer.
+Case = namedtuple('Case', 'name method url data')
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+@contextmanager
+def private_cache():
+    with override_settings(CACHES=SCRATCH_CACHES):
+        yield
+
+
+@contextmanager
+def scratch_database():
+    """A throwaway test database and a private cache, so generated data
+    reaches neither the real database nor the workers' cache."""
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        with private_cache():
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)), 1) - 1]
+
+
+def viewset_model(viewset):
+    if viewset.queryset is not None:
+        return viewset.queryset.model
+    return viewset.serializer_class.Meta.model
+
+
+def router_cases(samples):
+    """GET cases for every list, detail and extra action route of
+    v1_router, filled in with the sample objects keyed by model."""
+    comment = samples[Comment]
+    nested = {'title_id': comment.review.title_id,
+              'review_id': comment.review_id}
+    cases = []
+    for prefix, viewset, basename in v1_router.registry:
+        kwargs = {name: value for name, value in nested.items()
+                  if f'<{name}>' in prefix}
+        lookup = viewset.lookup_url_kwarg or viewset.lookup_field
+        for route in v1_router.get_routes(viewset):
+            if 'get' not in v1_router.get_method_map(viewset, route.mapping):
+                continue
+            name = route.name.format(basename=basename)
+            route_kwargs = dict(kwargs)
+            if '{lookup}' in route.url:
+                route_kwargs[lookup] = getattr(
+                    samples[viewset_model(viewset)], viewset.lookup_field
+                )
+            cases.append(Case(name, 'get', reverse(name, kwargs=route_kwargs),
+                              None))
+    return cases
+
+
+def endpoint_cases():
+    """GET cases of the export and leaderboard routes outside v1_router."""
+    return [
+        Case(f'export-{name}', 'get', reverse('export', kwargs={'name': name}),
+             None) for name in EXPORT_ROWS
+    ] + [
+        Case(f'leaderboard-{board}', 'get',
+             reverse('leaderboard', kwargs={'board': board}), None)
+        for board in BOARDS
+    ]
+
+
+def write_cases(samples):
+    """Repeatable writes: a title edit and new genres and comments."""
+    comment = samples[Comment]
+
+    def genre_data():
+        # unique across runs on the same data, of a constant length
+        suffix = uuid.uuid4().hex[:16]
+        return {'name': f'Benchmark {suffix}', 'slug': f'benchmark-{suffix}'}
+
+    return [
+        Case('titles-partial-update', 'patch',
+             reverse('titles-detail', kwargs={'pk': samples[Title].pk}),
+             {'name': 'Benchmark'}),
+        Case('genres-create', 'post', reverse('genres-list'), genre_data),
+        Case('comments-create', 'post', reverse('comments-list', kwargs={
+            'title_id': comment.review.title_id,
+            'review_id': comment.review_id,
+        }), {'text': 'Benchmark'}),
+    ]
+
+
+def auth_cases(user):
+    def token_data():
+        return {'email': user.email,
+                'confirmation_code': issue_confirmation_code(user.pk)}
+
+    return [
+        Case('auth-email', 'post', '/api/v1/auth/email/',
+             {'email': user.email}),
+        Case('auth-token', 'post', reverse('token_obtain_pair'), token_data),
+        Case('auth-token-refresh', 'post', reverse('token_refresh'),
+             {'refresh': str(RefreshToken.for_user(user))}),
+    ]
+
+
+def pick_client(case, anonymous, admin):
+    """Anonymous client for public routes, the admin one for the rest."""
+    data = case.data() if callable(case.data) else case.data
+    response = getattr(anonymous, case.method)(case.url, data=data)
+    return admin if response.status_code in (401, 403) else anonymous
+
+
+def measure(client, case, requests, warmup):
+    latencies, queries, sizes = [], [], []
+    for number in range(warmup + requests):
+        data = case.data() if callable(case.data) else case.data
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = getattr(client, case.method)(case.url, data=data)
+            # streamed bodies run their queries while being read
+            content = (b''.join(response.streaming_content)
+                       if response.streaming else response.content)
+            elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise BenchmarkError(
+                f'{case.method.upper()} {case.url}: {response.status_code}'
+            )
+        if number >= warmup:
+            latencies.append(elapsed * 1000)
+            queries.append(len(context.captured_queries))
+            sizes.append(len(content))
+    stats = {f'p{percent}_ms': round(percentile(latencies, percent), 3)
+             for percent in PERCENTILES}
+    stats['queries'] = max(queries)
+    stats['bytes'] = max(sizes)
+    return stats
+
+
+def sample_objects(admin):
+    """One object per viewset model; nested ones belong together."""
+    comment = Comment.objects.select_related('review__title').order_by(
+        'pk'
+    ).first()
+    if comment is None:
+        raise BenchmarkError('The dataset has no comments to benchmark')
+    samples = {
+        viewset_model(viewset): viewset_model(viewset).objects.order_by(
+            'pk'
+        ).first() for _, viewset, _ in v1_router.registry
+    }
+    samples.update({Title: comment.review.title, Review: comment.review,
+                    Comment: comment, User: admin})
+    return samples
+
+
+def clients(admin):
+    anonymous = APIClient()
+    admin_client = APIClient()
+    token = RefreshToken.for_user(admin).access_token
+    admin_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return anonymous, admin_client
+
+
+def run_benchmarks(admin, requests, warmup):
+    """Measures every case against the current database contents."""
+    anonymous, admin_client = clients(admin)
+    results = {}
+    samples = sample_objects(admin)
+    cases = (router_cases(samples) + endpoint_cases() + auth_cases(admin)
+             + write_cases(samples))
+    for case in cases:
+        client = pick_client(case, anonymous, admin_client)
+        # collector pauses would land in random cases' tail latencies
+        gc.collect()
+        gc.disable()
+        try:
+            results[case.name] = measure(client, case, requests, warmup)
+        finally:
+            gc.enable()
+    return results
+
+
+def serializer_querysets():
+    """Read serializers with the querysets their views serialize."""
+    return (
+        (TitleReadSerializer, Title.objects.select_related(
+            'category'
+        ).prefetch_related('genre')),
+        (ReviewSerializer, Review.objects.select_related('author')),
+        (CommentSerializer, Comment.objects.select_related('author')),
+    )
+
+
+def cpu_per_row(serialize, repeat):
+    """Median CPU microseconds per row of `serialize()`, which fetches
+    and serializes a page and returns its data."""
+    timings = []
+    for _ in range(repeat):
+        started = time.process_time()
+        data = serialize()
+        timings.append((time.process_time() - started) / max(len(data), 1))
+    return round(statistics.median(timings) * 1e6, 2)
+
+
+def serializer_benchmarks(rows, repeat):
+    """CPU time per row of fetching and serializing a `rows` page with
+    each read serializer and with its compiled form."""
+    results = {}
+    for serializer_class, queryset in serializer_querysets():
+        compiled = compile_serializer(serializer_class)
+        gc.collect()
+        gc.disable()
+        try:
+            results[serializer_class.__name__] = {
+                'drf_us_per_row': cpu_per_row(lambda: serializer_class(
+                    list(queryset[:rows]), many=True
+                ).data, repeat),
+                'compiled_us_per_row': cpu_per_row(lambda: compiled.serialize(
+                    list(compiled.values(queryset)[:rows])
+                ), repeat),
+            }
+        finally:
+            gc.enable()
+    return results
+
+
+def baseline_scales(results):
+    """`results` reduced to the BASELINE_KEYS stats."""
+    return {scale: {name: {key: stats[key] for key in BASELINE_KEYS}
+                    for name, stats in cases.items()}
+            for scale, cases in results.items()}
+
+
+def compare(results, baseline, tolerance):
+    """Lists regressions of `results` against `baseline`, both shaped as
+    {scale: {case: stats}}. Query counts may never grow; response sizes
+    may grow by BYTES_TOLERANCE, and latencies, when the baseline has
+    them (the `--output` of a run on the same machine), by `tolerance`
+    (a fraction)."""
+    regressions = []
+    for scale, cases in results.items():
+        for name, stats in cases.items():
+            base = baseline.get(scale, {}).get(name)
+            if base is None:
+                continue
+            if stats['queries'] > base['queries']:
+                regressions.append(
+                    f'scale {scale} {name}: queries '
+                    f'{base["queries"]} -> {stats["queries"]}'
+                )
+            if stats['bytes'] > base['bytes'] * (1 + BYTES_TOLERANCE):
+                regressions.append(
+                    f'scale {scale} {name}: bytes '
+                    f'{base["bytes"]} -> {stats["bytes"]}'
+                )
+            for key in COMPARED_LATENCIES:
+                if (key in base
+                        and stats[key] > base[key] * (1 + tolerance)
+                        and stats[key] - base[key] > LATENCY_FLOOR_MS):
+                    regressions.append(
+                        f'scale {scale} {name}: {key} '
+                        f'{base[key]} -> {stats[key]}'
+                    )
+    return regressions
@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import urlencode
+
+from .profiling import PROFILE_PARAM
+
+# Query params that do not change the response body.
+IGNORED_PARAMS = (PROFILE_PARAM, )
+
+
+def version_key(model):
+    return f'api:version:{model._meta.label_lower}'
+
+
+def get_version(model):
+    key = version_key(model)
+    version = cache.get(key)
+    if version is None:
+        # A fresh counter must not collide with entries written under a
+        # counter that was evicted, hence the clock instead of 1.
+        version = time.time_ns()
+        cache.add(key, version, None)
+        version = cache.get(key, version)
+    return version
+
+
+def bump_version(model):
+    try:
+        cache.incr(version_key(model))
+    except ValueError:
+        cache.set(version_key(model), time.time_ns(), None)
+
+
+def cache_params(query_params):
+    """`query_params` as a canonical query string, without
+    IGNORED_PARAMS."""
+    return urlencode(sorted(
+        (name, values) for name, values in query_params.lists()
+        if name not in IGNORED_PARAMS
+    ), doseq=True)
+
+
+def list_key(model, query_params):
+    params = cache_params(query_params)
+    return (f'api:list:{model._meta.label_lower}:'
+            f'{get_version(model)}:{params}')
+
+
+def get_list_timeout():
+    return getattr(settings, 'API_LIST_CACHE_TIMEOUT', 300)
@@ -0,0 +1,156 @@
+from functools import lru_cache
+from types import SimpleNamespace
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import F
+from rest_framework import serializers
+
+from .profiling import phase
+
+# values() alias of the parent's primary key in grouped many queries.
+PARENT = '_compiled_parent'
+
+
+def represent(value, to_representation):
+    return None if value is None else to_representation(value)
+
+
+class CompiledReadSerializer:
+    """
+    Read-only equivalent of a ModelSerializer class over `values()` rows.
+
+    The serializer's fields are resolved once into the columns to fetch and
+    one accessor per field: model fields read their column through the
+    field's own to_representation(), slug related fields read the related
+    column, nested serializers are compiled with the relation as column
+    prefix, and nested `many` serializers of a many-to-many field are
+    filled by one grouped query per page. Properties read the columns
+    listed for them in the serializer's `Meta.values_sources`.
+
+    With `fields`, only those fields are compiled, so the columns, joins
+    and grouped queries of the others are never issued.
+    """
+
+    def __init__(self, serializer_class, prefix='', fields=None):
+        self.model = serializer_class.Meta.model
+        self.prefix = prefix
+        self.columns = []
+        self.accessors = []
+        # forward relations read through a join
+        self.relations = []
+        # (field name, many-to-many field, compiled child)
+        self.many = []
+        sources = getattr(serializer_class.Meta, 'values_sources', {})
+        for name, field in serializer_class().fields.items():
+            if field.write_only or (fields is not None
+                                    and name not in fields):
+                continue
+            self.accessors.append(
+                (name, self.compile_field(field, sources))
+            )
+        if self.many:
+            self.columns.append('pk')
+
+    def column(self, name):
+        column = self.prefix + name
+        if column not in self.columns:
+            self.columns.append(column)
+        return column
+
+    def compile_field(self, field, sources):
+        source = field.source
+        if isinstance(field, serializers.ListSerializer):
+            model_field = self.model._meta.get_field(source)
+            if self.prefix or not model_field.many_to_many:
+                raise ImproperlyConfigured(
+                    f'{source}: only top-level many-to-many fields can be '
+                    f'compiled'
+                )
+            child = CompiledReadSerializer(type(field.child))
+            self.many.append((field.field_name, model_field, child))
+            return lambda row: []
+        if isinstance(field, serializers.BaseSerializer):
+            child = CompiledReadSerializer(
+                type(field), f'{self.prefix}{source}__'
+            )
+            self.columns.extend(column for column in child.columns
+                                if column not in self.columns)
+            self.relations.append(self.prefix + source)
+            self.relations.extend(child.relations)
+            key = self.column(source)
+            return lambda row: (None if row[key] is None
+                                else child.represent(row))
+        if isinstance(field, serializers.SlugRelatedField):
+            self.relations.append(self.prefix + source)
+            key = self.column(f'{source}__{field.slug_field}')
+            return lambda row: row[key]
+        if '.' in source or source == '*':
+            raise ImproperlyConfigured(f'{source}: cannot be compiled')
+        to_representation = field.to_representation
+        try:
+            self.model._meta.get_field(source)
+        except FieldDoesNotExist:
+            if source not in sources:
+                raise ImproperlyConfigured(
+                    f'{source}: add the columns it reads to '
+                    f'Meta.values_sources'
+                )
+            getter = getattr(self.model, source).fget
+            keys = [(name, self.column(name)) for name in sources[source]]
+            return lambda row: represent(
+                getter(SimpleNamespace(**{name: row[key]
+                                          for name, key in keys})),
+                to_representation
+            )
+        key = self.column(source)
+        return lambda row: represent(row[key], to_representation)
+
+    def values(self, queryset, *extra):
+        """`queryset` as dicts of the compiled columns and `extra` ones."""
+        columns = self.columns + [column for column in extra
+                                  if column not in self.columns]
+        return queryset.prefetch_related(None).values(*columns)
+
+    def only(self, queryset, *extra):
+        """`queryset` as model instances loading just the compiled columns,
+        relations and many-to-many fields, and `extra` columns."""
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if self.relations:
+            queryset = queryset.select_related(*self.relations)
+        if self.many:
+            queryset = queryset.prefetch_related(
+                *(model_field.name for _, model_field, _ in self.many)
+            )
+        return queryset.only(*self.columns, *extra)
+
+    def represent(self, row):
+        return {name: accessor(row) for name, accessor in self.accessors}
+
+    def serialize(self, rows):
+        """The representations of `rows`, as the serializer's data."""
+        with phase('serialize'):
+            data = [self.represent(row) for row in rows]
+            for name, model_field, child in self.many:
+                self.fill_many(rows, data, name, model_field, child)
+        return data
+
+    def fill_many(self, rows, data, name, model_field, child):
+        items = {}
+        for row, item in zip(rows, data):
+            items.setdefault(row['pk'], []).append(item[name])
+        if not items:
+            return
+        # the same join as prefetch_related(), so rows come in its order
+        related_query_name = model_field.related_query_name()
+        related = model_field.related_model._default_manager.filter(**{
+            f'{related_query_name}__in': list(items)
+        }).values(*child.columns, **{PARENT: F(related_query_name)})
+        for related_row in related:
+            value = child.represent(related_row)
+            for target in items[related_row[PARENT]]:
+                target.append(value)
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(serializer_class, fields=None):
+    return CompiledReadSerializer(serializer_class, fields=fields)
@@ -0,0 +1,111 @@
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Comment, Review, Title
+from .serializers import (CommentSerializer, ReviewSerializer,
+                          TitleReadSerializer)
+
+EXPORT_CHUNK_SIZE = 1000
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def chunks(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Walks the table by primary key, one bounded query per chunk.
+
+    Unlike `iterator()`, each chunk is a regular evaluation, so
+    `prefetch_related` still applies."""
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        chunk_queryset = queryset
+        if last_pk is not None:
+            chunk_queryset = queryset.filter(pk__gt=last_pk)
+        chunk = list(chunk_queryset[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def serialized_rows(queryset, serializer_class, parent_field=None):
+    for chunk in chunks(queryset):
+        data = serializer_class(chunk, many=True).data
+        for obj, row in zip(chunk, data):
+            if parent_field is not None:
+                row[parent_field] = getattr(obj, f'{parent_field}_id')
+            yield row
+
+
+def title_rows():
+    return serialized_rows(
+        Title.objects.select_related('category').prefetch_related('genre'),
+        TitleReadSerializer
+    )
+
+
+def review_rows():
+    return serialized_rows(
+        Review.objects.select_related('author'), ReviewSerializer, 'title'
+    )
+
+
+def comment_rows():
+    return serialized_rows(
+        Comment.objects.select_related('author'), CommentSerializer, 'review'
+    )
+
+
+def encode_json(value):
+    return json.dumps(
+        value, cls=JSONEncoder,
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        separators=(',', ':') if api_settings.COMPACT_JSON else None,
+    )
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield encode_json(row) + '\n'
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    header = None
+    for row in rows:
+        if header is None:
+            header = list(row)
+            yield writer.writerow(header)
+        yield writer.writerow([
+            encode_json(row[key]) if isinstance(row[key], (dict, list))
+            else row[key]
+            for key in header
+        ])
+
+
+EXPORT_ROWS = {
+    'titles': title_rows,
+    'reviews': review_rows,
+    'comments': comment_rows,
+}
+
+EXPORT_FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
+
+
+def export_response(name, rows, output):
+    lines, content_type = EXPORT_FORMATS[output]
+    response = StreamingHttpResponse(lines(rows), content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{name}.{output}"'
+    )
+    return response
@@ -0,0 +1,64 @@
+from rest_framework.exceptions import ValidationError
+
+from .compiled import compile_serializer
+
+FIELDS_PARAM = 'fields'
+
+
+def requested_fields(request, serializer_class):
+    """
+    The `serializer_class` fields a GET request asks for with
+    `?fields=id,name`, in the serializer's order, or None for all of them.
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+    value = request.query_params.get(FIELDS_PARAM)
+    if not value:
+        return None
+    available = serializer_class.Meta.fields
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    if not requested:
+        raise ValidationError({FIELDS_PARAM: [
+            f'List at least one field. Available: {", ".join(available)}.'
+        ]})
+    unknown = requested.difference(available)
+    if unknown:
+        raise ValidationError({FIELDS_PARAM: [
+            f'Unknown fields: {", ".join(sorted(unknown))}. '
+            f'Available: {", ".join(available)}.'
+        ]})
+    return tuple(name for name in available if name in requested)
+
+
+class SparseFieldsetMixin:
+    """Leaves out the fields a GET request did not ask for with
+    `?fields=`."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get('request'), type(self))
+        if fields is not None:
+            for name in set(self.fields).difference(fields):
+                self.fields.pop(name)
+
+
+class SparseQuerysetMixin:
+    """
+    Loads only what the `?fields=` subset of the read serializer needs in
+    `list()` and `retrieve()`: joins and prefetches of the dropped
+    relations are removed and unused columns deferred.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        serializer_class = self.get_serializer_class()
+        fields = requested_fields(self.request, serializer_class)
+        if fields is None:
+            return queryset
+        extra = [field.lstrip('-')
+                 for field in getattr(self, 'cursor_ordering', ())]
+        return compile_serializer(serializer_class, fields).only(
+            queryset, *extra
+        )
@@ -1,10 +1,11 @@
 from django_filters import rest_framework as filters
 
 from .models import Title
+from .search import get_search_backend
 
 
 class TitleFilter(filters.FilterSet):
-    name = filters.CharFilter(field_name='name', lookup_expr='contains')
+    name = filters.CharFilter(method='search_name')
     category = filters.CharFilter(field_name='category__slug',
                                   lookup_expr='exact')
     genre = filters.CharFilter(field_name='genre__slug', lookup_expr='exact')
@@ -12,3 +13,6 @@ class TitleFilter(filters.FilterSet):
     class Meta:
         model = Title
         fields = ['name', 'category', 'genre', 'year', ]
+
+    def search_name(self, queryset, name, value):
+        return get_search_backend().search(queryset, value)
@@ -0,0 +1,219 @@
+import glob
+import json
+import re
+import statistics
+import time
+from collections import OrderedDict
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connection, models, transaction
+from django.db.migrations import AddIndex, Migration
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import urlencode
+
+from .authentication import user_cache
+from .benchmarks import (Case, clients, pick_client, router_cases,
+                         sample_objects)
+from .models import Title
+
+SCRATCH_INDEX = 'advisor_candidate_idx'
+
+# Full table scans and sorts without an index, per backend.
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR|^\s*(?:->\s*)?Sort\b')
+
+# comparisons with a value; `= "other"."column"` is a join condition
+EQUALITY = r'(?:= (?!")|IN \()'
+RANGE = r'(?:>|<|BETWEEN |LIKE )'
+ORDER_BY = re.compile(r'ORDER BY (.+?)(?: LIMIT| OFFSET|\)|$)')
+ORDER_ITEM = re.compile(r'"(\w+)"\."(\w+)"')
+
+
+def filter_cases(samples):
+    """titles-list once per TitleFilter field, with the sample's values."""
+    title = samples[Title]
+    genre = title.genre.first()
+    values = {'name': title.name.split()[0], 'year': title.year,
+              'category': title.category.slug,
+              'genre': genre.slug if genre else 'drama'}
+    return [Case(f'titles-list?{name}', 'get',
+                 '/api/v1/titles/?' + urlencode({name: value}), None)
+            for name, value in values.items()]
+
+
+def select_statements(statements):
+    """Distinct SELECTs, in first-seen order."""
+    return list(OrderedDict.fromkeys(
+        sql for sql in statements
+        if sql.lstrip().upper().startswith('SELECT')
+    ))
+
+
+def benchmark_workload(admin):
+    """The SQL of every benchmarked GET route plus the title filters."""
+    anonymous, admin_client = clients(admin)
+    samples = sample_objects(admin)
+    statements = []
+    for case in router_cases(samples) + filter_cases(samples):
+        client = pick_client(case, anonymous, admin_client)
+        # cached responses would hide the queries behind them
+        cache.clear()
+        user_cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            getattr(client, case.method)(case.url, data=case.data)
+        statements.extend(query['sql'] for query in context.captured_queries)
+    return select_statements(statements)
+
+
+def logged_workload(path):
+    """Statements recorded by the slow query log and its rotated files."""
+    statements = []
+    for log_path in sorted(glob.glob(glob.escape(path) + '*')):
+        with open(log_path, encoding='utf-8') as log_file:
+            for line in log_file:
+                try:
+                    statement = json.loads(line).get('statement')
+                except ValueError:
+                    continue
+                if statement:
+                    statements.append(statement)
+    return select_statements(statements)
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+        return [str(row[-1]) for row in cursor.fetchall()]
+
+
+def plan_problems(plan):
+    """Tables read by a full scan, and whether a sort needs a temp table."""
+    scanned = set()
+    for line in plan:
+        match = SQLITE_SCAN.match(line.strip()) or POSTGRES_SCAN.search(line)
+        if match:
+            scanned.add(match.group(1))
+    return scanned, any(TEMP_SORT.search(line) for line in plan)
+
+
+def columns_before(sql, table, operator):
+    return re.findall(r'"{}"\."(\w+)" {}'.format(re.escape(table), operator),
+                      sql)
+
+
+def order_columns(sql, table):
+    """Leading ORDER BY columns of `table` in the outermost ORDER BY."""
+    orders = ORDER_BY.findall(sql)
+    if not orders:
+        return []
+    columns = []
+    for item_table, column in ORDER_ITEM.findall(orders[-1]):
+        if item_table != table:
+            break
+        columns.append(column)
+    return columns
+
+
+def candidate_columns(sql, table, sorted_in_temp):
+    """Equality columns first, then the sort or else the range column."""
+    columns = list(OrderedDict.fromkeys(columns_before(sql, table, EQUALITY)))
+    tail = order_columns(sql, table) if sorted_in_temp else []
+    if not tail:
+        tail = columns_before(sql, table, RANGE)[:1]
+    columns.extend(column for column in tail if column not in columns)
+    return tuple(columns)
+
+
+def existing_indexes(table):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [tuple(constraint['columns']) for constraint
+            in constraints.values()
+            if constraint['index'] or constraint['unique']
+            or constraint['primary_key']]
+
+
+def table_models():
+    return {model._meta.db_table: model
+            for model in apps.get_app_config('api').get_models()}
+
+
+def propose(statements):
+    """{(table, columns): statements it may speed up} for scans and sorts
+    that no existing index prefix covers."""
+    models_by_table = table_models()
+    candidates = OrderedDict()
+    for sql in statements:
+        scanned, sorted_in_temp = plan_problems(query_plan(sql))
+        tables = set(scanned)
+        if sorted_in_temp:
+            tables.update(table for table, _ in ORDER_ITEM.findall(
+                ' '.join(ORDER_BY.findall(sql)[-1:])
+            ))
+        for table in tables & set(models_by_table):
+            columns = candidate_columns(sql, table, sorted_in_temp)
+            if not columns or any(index[:len(columns)] == columns
+                                  for index in existing_indexes(table)):
+                continue
+            candidates.setdefault((table, columns), []).append(sql)
+    return candidates
+
+
+def workload_time(statements, repeat):
+    total = 0.0
+    with connection.cursor() as cursor:
+        for sql in statements:
+            runs = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                cursor.execute(sql)
+                cursor.fetchall()
+                runs.append(time.perf_counter() - started)
+            total += statistics.median(runs)
+    return total
+
+
+def evaluate(table, columns, statements, repeat):
+    """Times `statements` without and with the index, which only exists
+    inside a rolled back transaction. Returns (before, after, used)."""
+    before = workload_time(statements, repeat)
+    quote = connection.ops.quote_name
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE INDEX {} ON {} ({})'.format(
+                quote(SCRATCH_INDEX), quote(table),
+                ', '.join(map(quote, columns))
+            ))
+        used = any(SCRATCH_INDEX in line for sql in statements
+                   for line in query_plan(sql))
+        after = workload_time(statements, repeat)
+        transaction.set_rollback(True)
+    return before, after, used
+
+
+def build_index(table, columns):
+    model = table_models()[table]
+    fields = {field.column: field.name
+              for field in model._meta.concrete_fields}
+    index = models.Index(fields=[fields[column] for column in columns])
+    index.set_name_with_model(model)
+    return model, index
+
+
+def build_migration(indexes, name):
+    """A migration adding `indexes`, a list of (model, index), after the
+    latest api migration."""
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    leaf = loader.graph.leaf_nodes('api')[0]
+    number = int(leaf[1].split('_')[0]) + 1
+    migration = Migration(f'{number:04d}_{name}', 'api')
+    migration.dependencies = [leaf]
+    migration.operations = [
+        AddIndex(model_name=model._meta.model_name, index=index)
+        for model, index in indexes
+    ]
+    return MigrationWriter(migration)
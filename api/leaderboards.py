@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import LeaderboardPrior, Title, TitleRanking
+
+BOARDS = {
+    'top-rated': ('-weighted_score', '-title_id'),
+    'most-reviewed': ('-review_count', '-title_id'),
+}
+
+
+def compute_prior_mean():
+    totals = Title.objects.aggregate(
+        score_sum=Sum('rating_sum'), score_count=Sum('rating_count')
+    )
+    if not totals['score_count']:
+        return 0.0
+    return totals['score_sum'] / totals['score_count']
+
+
+def get_prior_mean():
+    """Mean score over all reviews, frozen between leaderboard rebuilds so
+    a single review only moves its own title's rows."""
+    prior_mean = LeaderboardPrior.objects.filter(
+        pk=LeaderboardPrior.SINGLETON_PK
+    ).values_list('mean', flat=True).first()
+    if prior_mean is None:
+        prior_mean = LeaderboardPrior.objects.get_or_create(
+            pk=LeaderboardPrior.SINGLETON_PK,
+            defaults={'mean': compute_prior_mean()}
+        )[0].mean
+    return prior_mean
+
+
+def set_prior_mean(prior_mean):
+    LeaderboardPrior.objects.update_or_create(
+        pk=LeaderboardPrior.SINGLETON_PK,
+        defaults={'mean': prior_mean, 'computed_at': timezone.now()}
+    )
+
+
+def weighted_score(rating_sum, rating_count, prior_mean):
+    prior_count = settings.LEADERBOARD_PRIOR_COUNT
+    return ((rating_sum + prior_count * prior_mean)
+            / (rating_count + prior_count))
+
+
+def build_rankings(title_id, category_id, genre_ids, rating_sum,
+                   rating_count, prior_mean):
+    score = weighted_score(rating_sum, rating_count, prior_mean)
+    scopes = [(TitleRanking.Kind.ALL, 0),
+              (TitleRanking.Kind.CATEGORY, category_id)]
+    scopes.extend((TitleRanking.Kind.GENRE, genre_id)
+                  for genre_id in genre_ids)
+    return [
+        TitleRanking(title_id=title_id, kind=kind, scope_id=scope_id,
+                     weighted_score=score, review_count=rating_count)
+        for kind, scope_id in scopes
+    ]
+
+
+def sync_title_rankings(title_id):
+    """Rewrites all leaderboard rows of a title, e.g. after its category
+    or genres changed."""
+    title = Title.objects.filter(pk=title_id).values(
+        'category_id', 'rating_sum', 'rating_count'
+    ).first()
+    TitleRanking.objects.filter(title_id=title_id).delete()
+    if title is None:
+        return
+    genre_ids = Title.genre.through.objects.filter(
+        title_id=title_id
+    ).values_list('genre_id', flat=True)
+    TitleRanking.objects.bulk_create(build_rankings(
+        title_id, genre_ids=genre_ids, prior_mean=get_prior_mean(), **title
+    ))
+
+
+def update_title_rankings(title_id):
+    title = Title.objects.filter(pk=title_id).values(
+        'rating_sum', 'rating_count'
+    ).first()
+    if title is None:
+        return
+    # Rows are created by sync_title_rankings on Title writes; titles
+    # loaded in bulk get theirs from `manage.py rebuild_leaderboards`.
+    TitleRanking.objects.filter(title_id=title_id).update(
+        weighted_score=weighted_score(prior_mean=get_prior_mean(), **title),
+        review_count=title['rating_count'],
+    )
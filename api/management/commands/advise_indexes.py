@@ -0,0 +1,100 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import BenchmarkError, private_cache, scratch_database
+from api.index_advisor import (benchmark_workload, build_index,
+                               build_migration, evaluate, logged_workload,
+                               propose)
+from api.models import User
+
+
+class Command(BaseCommand):
+    help = ('Replays a query workload, proposes indexes for full scans and '
+            'temp sorts, measures them and writes a migration')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workload', default='benchmark',
+            help='"benchmark", or the path of a slow query log to replay'
+        )
+        parser.add_argument('--scale', type=int, default=10,
+                            help='Size of the generated scratch dataset')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--min-benefit', type=float, default=0.2,
+            help='Share of the affected statements time an index must save'
+        )
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help='Use the configured database instead of a generated '
+                 'scratch one; candidate indexes are always rolled back'
+        )
+        parser.add_argument('--name', default='advised_indexes')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Print the migration instead of writing it')
+
+    def handle(self, *args, **options):
+        if options['in_place']:
+            # the workload clears the cache, which must not be the workers'
+            with private_cache():
+                accepted = self.advise(options)
+        else:
+            with scratch_database():
+                call_command('generate_dataset', scale=options['scale'],
+                             seed=options['seed'], stdout=StringIO())
+                User.objects.create_superuser(
+                    'advisor', 'advisor@yamdb.fake', role=User.Role.ADMIN
+                )
+                accepted = self.advise(options)
+
+        if not accepted:
+            self.stdout.write('No index is worth adding for this workload')
+            return
+        writer = build_migration(accepted, options['name'])
+        if options['dry_run']:
+            self.stdout.write(writer.as_string())
+            return
+        with open(writer.path, 'w', encoding='utf-8') as migration_file:
+            migration_file.write(writer.as_string())
+        self.stdout.write(f'Migration written to {writer.path}; add to the '
+                          f'models\' Meta.indexes:')
+        for model, index in accepted:
+            self.stdout.write(
+                f'  {model.__name__}: models.Index(fields={index.fields!r}, '
+                f'name={index.name!r})'
+            )
+
+    def advise(self, options):
+        if options['workload'] == 'benchmark':
+            admin = User.objects.filter(role=User.Role.ADMIN).first()
+            if admin is None:
+                raise CommandError('The benchmark workload needs an admin')
+            try:
+                statements = benchmark_workload(admin)
+            except BenchmarkError as error:
+                raise CommandError(error)
+        else:
+            statements = logged_workload(options['workload'])
+            if not statements:
+                raise CommandError(
+                    'The log has no statements to replay; record them with '
+                    'SLOW_QUERY_STATEMENTS=1'
+                )
+        self.stdout.write(f'{len(statements)} distinct statements replayed')
+
+        accepted = []
+        for (table, columns), affected in propose(statements).items():
+            before, after, used = evaluate(table, columns, affected,
+                                           options['repeat'])
+            benefit = (before - after) / before if before else 0.0
+            self.stdout.write(
+                f'{table} ({", ".join(columns)}): {len(affected)} statements,'
+                f' {before * 1000:.2f} -> {after * 1000:.2f} ms '
+                f'(saves {benefit:.0%}){"" if used else ", index not used"}'
+            )
+            if used and benefit >= options['min_benefit']:
+                accepted.append(build_index(table, columns))
+        return accepted
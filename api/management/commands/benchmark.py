@@ -0,0 +1,135 @@
+import json
+import os
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.authentication import user_cache
+from api.benchmarks import (BenchmarkError, baseline_scales, compare,
+                            run_benchmarks, scratch_database,
+                            serializer_benchmarks)
+from api.models import User
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks the GET routes of the v1 router, the export, '
+            'leaderboard and auth endpoints, and title edits, genre and '
+            'comment creation on generated datasets of growing size, and '
+            'compares the results with a stored baseline')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1,10,100')
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--serializer-rows', type=int, default=100,
+            help='Page size of the read serializer CPU comparison'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=1.0,
+            help='Allowed median latency growth, as a fraction, against a '
+                 'baseline with latencies'
+        )
+        parser.add_argument(
+            '--baseline',
+            default=os.path.join(settings.BASE_DIR, 'benchmarks',
+                                 'baseline.json'),
+            help='Query counts and response sizes to compare with; pass '
+                 'the --output of an earlier run on this machine to '
+                 'compare latencies too'
+        )
+        parser.add_argument('--output', help='Write the results as JSON')
+        parser.add_argument('--update-baseline', action='store_true')
+
+    def handle(self, *args, **options):
+        try:
+            scales = sorted({int(scale)
+                             for scale in options['scales'].split(',')})
+        except ValueError:
+            raise CommandError('--scales must be comma separated integers')
+        if not scales or scales[0] < 1:
+            raise CommandError('--scales must be positive integers')
+
+        # The datasets go into a throwaway test database, never the real one
+        try:
+            with scratch_database():
+                results, serializers = self.run(scales, options)
+        except BenchmarkError as error:
+            raise CommandError(error)
+
+        report = {'created': timezone.now().isoformat(),
+                  'requests': options['requests'], 'seed': options['seed'],
+                  'scales': results, 'serializers': serializers}
+        if options['output']:
+            self.write_json(options['output'], report)
+        if options['update_baseline']:
+            # latencies depend on the machine, so they stay out of it
+            self.write_json(options['baseline'], {
+                'seed': options['seed'], 'scales': baseline_scales(results)
+            })
+            self.stdout.write(f'Baseline written to {options["baseline"]}')
+            return
+        if not os.path.exists(options['baseline']):
+            self.stdout.write(
+                'No baseline found, run with --update-baseline to store one'
+            )
+            return
+        with open(options['baseline'], encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)['scales']
+        regressions = compare(results, baseline, options['tolerance'])
+        if regressions:
+            raise CommandError(
+                'Benchmark regressions:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write('No regressions against the baseline')
+
+    def run(self, scales, options):
+        admin = User.objects.create_superuser(
+            'benchmark', 'benchmark@yamdb.fake', role=User.Role.ADMIN
+        )
+        results, serializers = {}, {}
+        generated = 0
+        for scale in scales:
+            # datasets grow cumulatively: every scale adds the missing part
+            call_command('generate_dataset', scale=scale - generated,
+                         seed=options['seed'] + scale, stdout=StringIO())
+            generated = scale
+            cache.clear()
+            user_cache.clear()
+            results[str(scale)] = run_benchmarks(
+                admin, options['requests'], options['warmup']
+            )
+            serializers[str(scale)] = serializer_benchmarks(
+                options['serializer_rows'], options['requests']
+            )
+            self.print_scale(scale, results[str(scale)],
+                             serializers[str(scale)])
+        return results, serializers
+
+    def print_scale(self, scale, cases, serializers):
+        self.stdout.write(f'scale {scale}')
+        for name, stats in cases.items():
+            self.stdout.write(
+                f'  {name:<34} p50 {stats["p50_ms"]:>8.2f} ms  '
+                f'p95 {stats["p95_ms"]:>8.2f} ms  '
+                f'p99 {stats["p99_ms"]:>8.2f} ms  '
+                f'{stats["queries"]:>3} queries  {stats["bytes"]:>7} bytes'
+            )
+        for name, stats in serializers.items():
+            self.stdout.write(
+                f'  {name:<34} {stats["drf_us_per_row"]:>8.1f} us/row, '
+                f'compiled {stats["compiled_us_per_row"]:>8.1f} us/row'
+            )
+
+    def write_json(self, path, report):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as json_file:
+            json.dump(report, json_file, indent=2, sort_keys=True)
+            json_file.write('\n')
@@ -0,0 +1,257 @@
+import csv
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.models import Category, Comment, Genre, Review, Title, User
+
+TitleGenre = Title.genre.through
+
+# Each generated title gets round(template * lognormal) reviews: sigma
+# stretches the tail, mu keeps the template mean.
+REVIEW_COUNT_SIGMA = 0.6
+# Share of scores drawn from the dataset-wide histogram instead of the
+# template title's own reviews.
+SCORE_NOISE = 0.2
+COMMENT_DELAY = timedelta(days=30)
+
+
+def read_csv(path, file_name):
+    with open(os.path.join(path, file_name), encoding='utf-8',
+              newline='') as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+class Profile:
+    """Distributions of the data/*.csv dataset that generated rows follow."""
+
+    def __init__(self, path):
+        self.categories = read_csv(path, 'category.csv')
+        self.genres = read_csv(path, 'genre.csv')
+        titles = read_csv(path, 'titles.csv')
+        users = read_csv(path, 'users.csv')
+        reviews = read_csv(path, 'review.csv')
+        comments = read_csv(path, 'comments.csv')
+
+        # genre sets are cloned whole, which keeps their co-occurrence
+        genres = defaultdict(list)
+        for row in read_csv(path, 'genre_title.csv'):
+            genres[row['object_id']].append(int(row['genre_id']))
+        scores = defaultdict(list)
+        review_texts = defaultdict(list)
+        for row in reviews:
+            scores[row['object_id']].append(int(row['score']))
+            review_texts[row['object_id']].append(row['text'])
+        self.templates = [
+            (row['title'], int(row['year']), int(row['category']),
+             genres[row['id']], scores[row['id']], review_texts[row['id']])
+            for row in titles
+        ]
+        self.score_histogram = Counter(int(row['score']) for row in reviews)
+
+        fan_out = Counter(row['review_id'] for row in comments)
+        self.comment_counts = [fan_out[row['id']] for row in reviews]
+        self.comment_texts = [row['text'] for row in comments]
+
+        dates = [parse_datetime(row['pub_date']).timestamp()
+                 for row in reviews]
+        self.first_date, self.last_date = min(dates), max(dates)
+        self.users_per_title = len(users) / len(titles)
+        self.max_reviews = max(map(len, scores.values()))
+
+
+class Writer:
+    """Buffers raw rows per table and flushes them as multi-row INSERTs."""
+
+    def __init__(self, tables, batch_size):
+        self.tables = tables
+        self.batch_size = batch_size
+        self.rows = {model: [] for model, _ in tables}
+        self.buffered = 0
+        self.written = Counter()
+
+    def add(self, model, row):
+        self.rows[model].append(row)
+        self.buffered += 1
+        if self.buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        # parents first: a batch never references rows of a later batch
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model, columns in self.tables:
+                rows = self.rows[model]
+                if rows:
+                    self.insert(cursor, model, columns, rows)
+                    self.written[model] += len(rows)
+                    rows.clear()
+        self.buffered = 0
+
+    def insert(self, cursor, model, columns, rows):
+        quote = connection.ops.quote_name
+        step = connection.ops.bulk_batch_size(columns, rows)
+        head = 'INSERT INTO {} ({}) VALUES '.format(
+            quote(model._meta.db_table), ', '.join(map(quote, columns))
+        )
+        placeholders = '({})'.format(', '.join(['%s'] * len(columns)))
+        for start in range(0, len(rows), step):
+            batch = rows[start:start + step]
+            cursor.execute(
+                head + ', '.join([placeholders] * len(batch)),
+                list(chain.from_iterable(batch)),
+            )
+
+
+def columns(model, *names):
+    return [model._meta.get_field(name).column for name in names]
+
+
+class Command(BaseCommand):
+    help = ('Generates a synthetic dataset N times the size of data/*.csv '
+            'with the same distributions')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, required=True)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--path', default=os.path.join(settings.BASE_DIR, 'data')
+        )
+        parser.add_argument('--batch-size', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        if options['scale'] < 1:
+            raise CommandError('--scale must be a positive integer')
+        self.profile = Profile(options['path'])
+        self.random = random.Random(options['seed'])
+        adapt = connection.ops.adapt_datetimefield_value
+        self.now = adapt(timezone.now())
+        self.adapt = adapt
+        self.writer = Writer((
+            (User, columns(User, 'id', 'password', 'is_superuser', 'username',
+                           'first_name', 'last_name', 'is_staff',
+                           'is_active', 'date_joined', 'email', 'bio',
+                           'role')),
+            (Title, columns(Title, 'id', 'name', 'year', 'description',
+                            'category', 'rating_sum', 'rating_count',
+                            'modified', 'reviews_modified')),
+            (TitleGenre, columns(TitleGenre, 'title', 'genre')),
+            (Review, columns(Review, 'id', 'title', 'text', 'author', 'score',
+                             'pub_date', 'comments_modified')),
+            (Comment, columns(Comment, 'id', 'review', 'text', 'author',
+                              'pub_date')),
+        ), options['batch_size'])
+
+        started = time.monotonic()
+        categories = {
+            int(row['id']): Category.objects.get_or_create(
+                slug=row['slug'], defaults={'name': row['title']}
+            )[0].pk for row in self.profile.categories
+        }
+        genres = {
+            int(row['id']): Genre.objects.get_or_create(
+                slug=row['slug'], defaults={'name': row['title']}
+            )[0].pk for row in self.profile.genres
+        }
+        users = self.generate_users(options['scale'])
+        self.generate_titles(options['scale'], users, categories, genres)
+        self.writer.flush()
+        elapsed = time.monotonic() - started
+        for model, written in self.writer.written.items():
+            self.stdout.write(f'{model._meta.db_table}: {written} rows')
+        total = sum(self.writer.written.values())
+        self.stdout.write(
+            f'{total} rows generated, {total / max(elapsed, 1e-6):.0f} rows/s'
+        )
+
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [User, Title, TitleGenre, Review, Comment]):
+                cursor.execute(sql)
+        call_command('rebuild_rating_distribution', stdout=self.stdout)
+        call_command('rebuild_leaderboards', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def generate_users(self, scale):
+        profile = self.profile
+        count = max(round(len(profile.templates) * scale
+                          * profile.users_per_title), profile.max_reviews)
+        first = self.next_id(User)
+        password = make_password(None)
+        for pk in range(first, first + count):
+            self.writer.add(User, (
+                pk, password, False, f'synthetic{pk}', '', '', False, True,
+                self.now, f'synthetic{pk}@yamdb.fake', '', User.Role.USER,
+            ))
+        return first, count
+
+    def pick_author(self, users):
+        # squaring skews activity: low ids write most of the reviews
+        first, count = users
+        return first + int(count * self.random.random() ** 2)
+
+    def generate_titles(self, scale, users, categories, genres):
+        profile, rng, add = self.profile, self.random, self.writer.add
+        histogram = list(profile.score_histogram)
+        weights = list(profile.score_histogram.values())
+        mu = -REVIEW_COUNT_SIGMA ** 2 / 2
+        title_id = self.next_id(Title)
+        review_id = self.next_id(Review)
+        comment_id = self.next_id(Comment)
+        span = profile.last_date - profile.first_date
+        for number in range(len(profile.templates) * scale):
+            name, year, category, genre_ids, scores, texts = rng.choice(
+                profile.templates
+            )
+            spread = rng.lognormvariate(mu, REVIEW_COUNT_SIGMA)
+            review_count = min(round(len(scores) * spread), users[1])
+            authors = set()
+            while len(authors) < review_count:
+                authors.add(self.pick_author(users))
+            reviews = [
+                (author, rng.choices(histogram, weights)[0]
+                 if rng.random() < SCORE_NOISE else rng.choice(scores))
+                for author in sorted(authors)
+            ]
+            # ratings are known here, so rebuild_ratings is not needed
+            add(Title, (
+                title_id, f'{name} {number + 1}', year, '',
+                categories[category],
+                sum(score for _, score in reviews), len(reviews),
+                self.now, self.now,
+            ))
+            for genre in genre_ids:
+                add(TitleGenre, (title_id, genres[genre]))
+            for author, score in reviews:
+                published = datetime.fromtimestamp(
+                    profile.first_date + rng.random() * span, timezone.utc
+                )
+                add(Review, (
+                    review_id, title_id, rng.choice(texts), author, score,
+                    self.adapt(published), self.now,
+                ))
+                for _ in range(rng.choice(profile.comment_counts)):
+                    add(Comment, (
+                        comment_id, review_id,
+                        rng.choice(profile.comment_texts),
+                        self.pick_author(users),
+                        self.adapt(published + rng.random() * COMMENT_DELAY),
+                    ))
+                    comment_id += 1
+                review_id += 1
+            title_id += 1
@@ -0,0 +1,180 @@
+import csv
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from api.models import Category, Comment, Genre, Review, Title, User
+
+TitleGenre = Title.genre.through
+
+
+class IdSet:
+    """Bitmap of primary keys, ~1 bit per id instead of a Python int."""
+
+    def __init__(self):
+        self.bits = bytearray()
+
+    def add(self, pk):
+        index, bit = divmod(pk, 8)
+        if index >= len(self.bits):
+            self.bits.extend(bytes(index - len(self.bits) + 1))
+        self.bits[index] |= 1 << bit
+
+    def __contains__(self, pk):
+        index, bit = divmod(pk, 8)
+        return index < len(self.bits) and bool(self.bits[index] >> bit & 1)
+
+
+def build_user(row):
+    return User(
+        id=int(row['id']), username=row['username'], email=row['email'],
+        role=row['role'], bio=row['description'],
+        first_name=row['first_name'], last_name=row['last_name'],
+        password=make_password(None),
+    )
+
+
+def build_category(row):
+    return Category(id=int(row['id']), name=row['title'], slug=row['slug'])
+
+
+def build_genre(row):
+    return Genre(id=int(row['id']), name=row['title'], slug=row['slug'])
+
+
+def build_title(row):
+    return Title(id=int(row['id']), name=row['title'], year=int(row['year']),
+                 category_id=int(row['category']))
+
+
+def build_title_genre(row):
+    return TitleGenre(id=int(row['id']), title_id=int(row['object_id']),
+                      genre_id=int(row['genre_id']))
+
+
+def build_review(row):
+    return Review(id=int(row['id']), title_id=int(row['object_id']),
+                  text=row['text'], author_id=int(row['author']),
+                  score=int(row['score']),
+                  pub_date=parse_datetime(row['pub_date']))
+
+
+def build_comment(row):
+    return Comment(id=int(row['id']), review_id=int(row['review_id']),
+                   text=row['text'], author_id=int(row['author']),
+                   pub_date=parse_datetime(row['pub_date']))
+
+
+# file name, model, row builder, {foreign key attname: referenced model}
+IMPORTS = (
+    ('users.csv', User, build_user, {}),
+    ('category.csv', Category, build_category, {}),
+    ('genre.csv', Genre, build_genre, {}),
+    ('titles.csv', Title, build_title, {'category_id': Category}),
+    ('genre_title.csv', TitleGenre, build_title_genre,
+     {'title_id': Title, 'genre_id': Genre}),
+    ('review.csv', Review, build_review,
+     {'title_id': Title, 'author_id': User}),
+    ('comments.csv', Comment, build_comment,
+     {'review_id': Review, 'author_id': User}),
+)
+
+# Models with unique constraints beyond the primary key: rows that break
+# them are dropped by the database instead of aborting the file.
+IGNORE_CONFLICTS = {Review}
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """bulk_create would overwrite the imported pub_date otherwise."""
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Bulk imports the data/*.csv dataset, preserving primary keys'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=os.path.join(settings.BASE_DIR, 'data')
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--ignore-conflicts', action='store_true')
+
+    def handle(self, *args, **options):
+        self.ids = {}
+        for file_name, model, build, references in IMPORTS:
+            path = os.path.join(options['path'], file_name)
+            if not os.path.exists(path):
+                self.stdout.write(f'{file_name}: not found, skipped')
+                continue
+            for reference in references.values():
+                self.load_ids(reference)
+            self.import_file(path, model, build, references, options)
+
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [model for _, model, _, _ in IMPORTS]):
+                cursor.execute(sql)
+        call_command('rebuild_ratings', stdout=self.stdout)
+        call_command('rebuild_rating_distribution', stdout=self.stdout)
+        call_command('rebuild_leaderboards', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+
+    def load_ids(self, model):
+        if model in self.ids:
+            return
+        ids = IdSet()
+        for pk in model.objects.values_list('pk', flat=True).iterator():
+            ids.add(pk)
+        self.ids[model] = ids
+
+    def import_file(self, path, model, build, references, options):
+        batch_size = options['batch_size']
+        ignore_conflicts = (options['ignore_conflicts']
+                            or model in IGNORE_CONFLICTS)
+        rows_before = model.objects.count() if ignore_conflicts else 0
+        sent = skipped = 0
+        started = time.monotonic()
+        with open(path, encoding='utf-8', newline='') as csv_file, \
+                transaction.atomic(), keep_auto_now_add(model):
+            objects = map(build, csv.DictReader(csv_file))
+            while True:
+                batch = list(islice(objects, batch_size))
+                if not batch:
+                    break
+                valid = [obj for obj in batch if all(
+                    getattr(obj, attname) in self.ids[reference]
+                    for attname, reference in references.items()
+                )]
+                model.objects.bulk_create(
+                    valid, batch_size=batch_size,
+                    ignore_conflicts=ignore_conflicts
+                )
+                sent += len(valid)
+                skipped += len(batch) - len(valid)
+        elapsed = time.monotonic() - started
+        imported = sent
+        if ignore_conflicts:
+            imported = model.objects.count() - rows_before
+            skipped += sent - imported
+        self.stdout.write(
+            f'{os.path.basename(path)}: {imported} rows imported, '
+            f'{skipped} skipped, {imported / max(elapsed, 1e-6):.0f} rows/s'
+        )
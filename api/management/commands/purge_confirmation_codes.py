@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import ConfirmationCode
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired confirmation codes in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = ConfirmationCode.objects.filter(
+            expires_at__lte=now
+        ).order_by('expires_at').values_list('pk', flat=True)
+        purged = 0
+        while True:
+            batch = list(expired[:options['batch_size']])
+            if not batch:
+                break
+            ConfirmationCode.objects.filter(pk__in=batch).delete()
+            purged += len(batch)
+        self.stdout.write(f'{purged} expired confirmation codes purged')
@@ -0,0 +1,51 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.leaderboards import (build_rankings, compute_prior_mean,
+                              set_prior_mean)
+from api.models import Title, TitleRanking
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the materialized leaderboards and their prior mean'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        titles = Title.objects.order_by('pk').values(
+            'pk', 'category_id', 'rating_sum', 'rating_count'
+        )
+        rows = 0
+        with transaction.atomic():
+            # stored with the rows, so that they never mix priors
+            prior_mean = compute_prior_mean()
+            set_prior_mean(prior_mean)
+            TitleRanking.objects.all().delete()
+            last_pk = 0
+            while True:
+                chunk = list(
+                    titles.filter(pk__gt=last_pk)[:options['chunk_size']]
+                )
+                if not chunk:
+                    break
+                genre_ids = defaultdict(list)
+                for title_id, genre_id in Title.genre.through.objects.filter(
+                    title_id__in=[title['pk'] for title in chunk]
+                ).values_list('title_id', 'genre_id'):
+                    genre_ids[title_id].append(genre_id)
+                rankings = []
+                for title in chunk:
+                    title_id = title.pop('pk')
+                    rankings.extend(build_rankings(
+                        title_id, genre_ids=genre_ids[title_id],
+                        prior_mean=prior_mean, **title
+                    ))
+                    last_pk = title_id
+                TitleRanking.objects.bulk_create(rankings)
+                rows += len(rankings)
+        self.stdout.write(
+            f'Leaderboards rebuilt ({rows} rows, prior mean {prior_mean:.2f})'
+        )
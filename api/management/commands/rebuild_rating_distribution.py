@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from api.models import Review, TitleScoreCount
+
+
+class Command(BaseCommand):
+    help = 'Recomputes every per-title score histogram in one GROUP BY pass'
+
+    def handle(self, *args, **options):
+        quote_name = connection.ops.quote_name
+        counts_table = quote_name(TitleScoreCount._meta.db_table)
+        reviews_table = quote_name(Review._meta.db_table)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {counts_table}')
+            cursor.execute(
+                f'INSERT INTO {counts_table} (title_id, score, count) '
+                f'SELECT title_id, score, COUNT(*) FROM {reviews_table} '
+                f'GROUP BY title_id, score'
+            )
+            rows = cursor.rowcount
+        self.stdout.write(f'Rating distribution rebuilt ({rows} rows)')
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from api.models import Review, Title
+
+
+class Command(BaseCommand):
+    help = 'Recalculates Title.rating_sum and Title.rating_count from reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        title_ids = Title.objects.order_by('pk').values_list('pk', flat=True)
+        last_pk = 0
+        updated = 0
+        while True:
+            chunk = list(title_ids.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            totals = {
+                row['title_id']: row for row in Review.objects.filter(
+                    title_id__in=chunk
+                ).values('title_id').annotate(
+                    score_sum=Sum('score'), score_count=Count('id')
+                )
+            }
+            titles = [
+                Title(
+                    pk=pk,
+                    rating_sum=totals.get(pk, {}).get('score_sum', 0),
+                    rating_count=totals.get(pk, {}).get('score_count', 0),
+                ) for pk in chunk
+            ]
+            with transaction.atomic():
+                Title.objects.bulk_update(
+                    titles, ['rating_sum', 'rating_count']
+                )
+            updated += len(chunk)
+            last_pk = chunk[-1]
+        self.stdout.write(f'Ratings rebuilt for {updated} titles')
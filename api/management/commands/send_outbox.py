@@ -0,0 +1,103 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import mail
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from api.models import OutboxEmail
+
+
+class Command(BaseCommand):
+    help = 'Delivers queued e-mails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--max-attempts', type=int, default=8)
+        parser.add_argument('--retry-delay', type=float, default=30.0,
+                            help='Base delay in seconds, doubled per attempt')
+        parser.add_argument('--lease', type=float, default=300.0,
+                            help='Seconds a claimed message stays reserved')
+        parser.add_argument('--once', action='store_true',
+                            help='Deliver what is due and exit')
+
+    def handle(self, *args, **options):
+        self.options = options
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                messages = self.claim()
+                if messages:
+                    size = -(-len(messages) // options['workers'])
+                    parts = [messages[i:i + size]
+                             for i in range(0, len(messages), size)]
+                    sent = sum(pool.map(self.deliver, parts))
+                    self.stdout.write(f'{sent}/{len(messages)} sent')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['interval'])
+
+    def claim(self):
+        now = timezone.now()
+        pending = OutboxEmail.objects.filter(
+            sent_at__isnull=True, next_attempt_at__lte=now
+        ).order_by('next_attempt_at')
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        with transaction.atomic():
+            messages = list(pending[:self.options['batch_size']])
+            OutboxEmail.objects.filter(
+                pk__in=[message.pk for message in messages]
+            ).update(next_attempt_at=now + timedelta(
+                seconds=self.options['lease']
+            ))
+        return messages
+
+    def deliver(self, messages):
+        """Sends one part of a batch over a single backend connection."""
+        sent = handled = 0
+        try:
+            with mail.get_connection(fail_silently=False) as backend:
+                for message in messages:
+                    try:
+                        backend.send_messages([mail.EmailMessage(
+                            message.subject, message.body,
+                            settings.NOREPLY_YAMDB_EMAIL, [message.to_email],
+                        )])
+                    except Exception as error:
+                        self.retry(message, error)
+                    else:
+                        self.mark_sent(message)
+                        sent += 1
+                    handled += 1
+        except Exception as error:
+            for message in messages[handled:]:
+                self.retry(message, error)
+        finally:
+            close_old_connections()
+        return sent
+
+    def mark_sent(self, message):
+        # A request may have replaced the body while it was being sent;
+        # then the row stays pending and the new code goes out next round.
+        OutboxEmail.objects.filter(
+            pk=message.pk, queued_at=message.queued_at
+        ).update(sent_at=timezone.now())
+
+    def retry(self, message, error):
+        attempts = message.attempts + 1
+        next_attempt_at = None
+        if attempts < self.options['max_attempts']:
+            next_attempt_at = timezone.now() + timedelta(
+                seconds=self.options['retry_delay'] * 2 ** (attempts - 1)
+            )
+        OutboxEmail.objects.filter(
+            pk=message.pk, queued_at=message.queued_at
+        ).update(attempts=attempts, next_attempt_at=next_attempt_at,
+                 last_error=str(error))
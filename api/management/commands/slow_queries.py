@@ -0,0 +1,60 @@
+import glob
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Ranks the fingerprints of the slow query log, including its '
+            'rotated files, by total time')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.SLOW_QUERY_LOG)
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--plans', action='store_true',
+                            help='Print the EXPLAIN plan of each fingerprint')
+
+    def handle(self, *args, **options):
+        stats = {}
+        for path in sorted(glob.glob(glob.escape(options['log']) + '*')):
+            with open(path, encoding='utf-8') as log_file:
+                for line in log_file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.add(stats, record)
+        if not stats:
+            self.stdout.write(f'No slow queries in {options["log"]}')
+            return
+
+        ranked = sorted(stats.values(), key=lambda item: item['total_ms'],
+                        reverse=True)
+        for rank, item in enumerate(ranked[:options['limit']], 1):
+            views = ', '.join(f'{view} ({count})' for view, count
+                              in item['views'].most_common(3))
+            self.stdout.write(
+                f'{rank}. {item["fingerprint"]}  total {item["total_ms"]:.0f}'
+                f' ms  count {item["count"]}  mean '
+                f'{item["total_ms"] / item["count"]:.1f} ms  max '
+                f'{item["max_ms"]:.1f} ms'
+            )
+            self.stdout.write(f'   views: {views or "-"}')
+            self.stdout.write(f'   {item["sql"]}')
+            if options['plans'] and item['plan']:
+                for plan_line in item['plan'].splitlines():
+                    self.stdout.write(f'     {plan_line}')
+
+    def add(self, stats, record):
+        item = stats.setdefault(record['fingerprint'], {
+            'fingerprint': record['fingerprint'], 'sql': record['sql'],
+            'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'views': Counter(),
+            'plan': None,
+        })
+        item['count'] += 1
+        item['total_ms'] += record['ms']
+        item['max_ms'] = max(item['max_ms'], record['ms'])
+        item['views'][record.get('view') or 'command'] += 1
+        item['plan'] = item['plan'] or record.get('plan')
@@ -0,0 +1,273 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'yamdb_requests_total': (
+        'counter', 'Requests by view action and status', None,
+    ),
+    'yamdb_request_duration_seconds': (
+        'histogram', 'Request latency by view action',
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    'yamdb_db_queries': (
+        'histogram', 'SQL queries per request by view action',
+        (0, 1, 2, 3, 5, 10, 20, 50, 100),
+    ),
+    'yamdb_cache_lookups_total': (
+        'counter', 'Cache lookups by view action, cache and result', None,
+    ),
+}
+
+# Per-request cache lookup counts, keyed by (cache name, hit or miss).
+cache_lookups = ContextVar('cache_lookups', default=None)
+# The request being handled, for labelling work done outside the view.
+current_request = ContextVar('current_request', default=None)
+
+
+def record_cache_lookup(cache_name, hit):
+    lookups = cache_lookups.get()
+    if lookups is not None:
+        lookups[cache_name, 'hit' if hit else 'miss'] += 1
+
+
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def escape(value):
+    return (str(value).replace('\\', r'\\').replace('\n', r'\n')
+            .replace('"', r'\"'))
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms of one process.
+
+    With a directory, every process periodically writes its values to
+    `<directory>/<pid>-<random>.json` and exposition sums all the files,
+    so any gunicorn worker can serve the metrics of all of them. The
+    random part keeps a worker that reuses the pid of an exited one from
+    overwriting its file. Files of exited workers are kept, so their
+    counts stay part of the totals; empty the directory before the server
+    starts, or the totals carry over from the previous run.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.flushed = 0.0
+        self.process_id = self.new_process_id()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.forked)
+
+    @staticmethod
+    def new_process_id():
+        return f'{os.getpid()}-{uuid.uuid4().hex}'
+
+    def forked(self):
+        # a worker forked from a process that already counted starts empty,
+        # under its own file
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.flushed = 0.0
+        self.process_id = self.new_process_id()
+
+    def inc(self, name, labels, amount=1):
+        with self.lock:
+            self.counters[name, label_key(labels)] += amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = name, label_key(labels)
+        with self.lock:
+            # one slot per bucket, then +Inf, sum
+            values = self.histograms.get(key)
+            if values is None:
+                values = self.histograms[key] = [0] * (len(buckets) + 2)
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    values[index] += 1
+                    break
+            else:
+                values[len(buckets)] += 1
+            values[-1] += value
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [[name, labels, value] for (name, labels), value
+                             in self.counters.items()],
+                'histograms': [[name, labels, list(values)]
+                               for (name, labels), values
+                               in self.histograms.items()],
+            }
+
+    def path(self):
+        return os.path.join(self.directory, f'{self.process_id}.json')
+
+    def flush(self, force=False):
+        if self.directory is None:
+            return
+        now = time.monotonic()
+        if not force and now - self.flushed < self.flush_interval:
+            return
+        self.flushed = now
+        path = self.path()
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w') as snapshot_file:
+            json.dump(self.snapshot(), snapshot_file)
+        os.replace(temporary, path)
+
+    def collect(self):
+        """Sums the snapshots of all processes, this one taken live."""
+        snapshots = [self.snapshot()]
+        if self.directory is not None:
+            own = os.path.basename(self.path())
+            for file_name in os.listdir(self.directory):
+                if not file_name.endswith('.json') or file_name == own:
+                    continue
+                try:
+                    with open(os.path.join(self.directory,
+                                           file_name)) as snapshot_file:
+                        snapshots.append(json.load(snapshot_file))
+                except (OSError, ValueError):
+                    continue
+        counters = defaultdict(float)
+        histograms = {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                counters[name, tuple(map(tuple, labels))] += value
+            for name, labels, values in snapshot['histograms']:
+                key = name, tuple(map(tuple, labels))
+                total = histograms.setdefault(key, [0] * len(values))
+                for index, value in enumerate(values):
+                    total[index] += value
+        return counters, histograms
+
+    def exposition(self):
+        """Prometheus text exposition format 0.0.4."""
+        counters, histograms = self.collect()
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{self.labels(labels)} {value}')
+                continue
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf', ), values):
+                    cumulative += count
+                    bucket_labels = labels + (('le', str(bound)), )
+                    lines.append(f'{name}_bucket'
+                                 f'{self.labels(bucket_labels)} {cumulative}')
+                lines.append(f'{name}_sum{self.labels(labels)} {values[-1]}')
+                lines.append(
+                    f'{name}_count{self.labels(labels)} {cumulative}'
+                )
+        return '\n'.join(lines) + '\n'
+
+    def labels(self, labels):
+        return '{{{}}}'.format(','.join(
+            f'{key}="{escape(value)}"' for key, value in labels
+        ))
+
+
+_registry = None
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _registry = MetricsRegistry(
+            directory, getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0)
+        )
+    return _registry
+
+
+def view_label(request):
+    """`TitleViewSet.list` for viewset actions, the view name otherwise."""
+    try:
+        match = request.resolver_match or resolve(request.path_info)
+    except Resolver404:
+        return 'unmatched'
+    view = match.func
+    cls = getattr(view, 'cls', None)
+    actions = getattr(view, 'actions', None)
+    if cls is not None and actions:
+        action = actions.get(request.method.lower(), request.method.lower())
+        return f'{cls.__name__}.{action}'
+    return getattr(view, '__name__', match.view_name)
+
+
+class MetricsMiddleware:
+    """Records count, latency, SQL queries and cache lookups of every
+    request, labelled by view action."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        registry = get_registry()
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        lookups = Counter()
+        token = cache_lookups.set(lookups)
+        request_token = current_request.set(request)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(count_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            cache_lookups.reset(token)
+            current_request.reset(request_token)
+        elapsed = time.perf_counter() - started
+
+        labels = {'view': view_label(request)}
+        registry.inc('yamdb_requests_total', dict(
+            labels, method=request.method, status=response.status_code
+        ))
+        registry.observe('yamdb_request_duration_seconds', labels, elapsed)
+        registry.observe('yamdb_db_queries', labels, queries)
+        for (cache_name, result), count in lookups.items():
+            registry.inc('yamdb_cache_lookups_total', dict(
+                labels, cache=cache_name, result=result
+            ), count)
+        registry.flush()
+        return response
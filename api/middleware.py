@@ -0,0 +1,41 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .routers import use_replica
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets safe requests read from replicas, except for clients that wrote
+    within the last REPLICA_PIN_SECONDS: those stay on the primary so they
+    see their own writes despite replication lag.
+
+    Pins are kept in the default cache, which must be shared by all worker
+    processes (Memcached, Redis, the database cache); with a per-process
+    LocMemCache a write only pins the reads of the worker that served it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def pin_key(self, request):
+        client = (request.META.get('HTTP_AUTHORIZATION')
+                  or request.META.get('REMOTE_ADDR', ''))
+        return 'api:pin:{}'.format(hashlib.md5(client.encode()).hexdigest())
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICA_ALIASES:
+            return self.get_response(request)
+        key = self.pin_key(request)
+        if request.method not in SAFE_METHODS:
+            cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+            return self.get_response(request)
+        token = use_replica.set(not cache.get(key, False))
+        try:
+            return self.get_response(request)
+        finally:
+            use_replica.reset(token)
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+SQLITE_TABLE = 'api_title_fts'
+POSTGRES_INDEX = 'api_title_name_tsv_idx'
+# first SQLite release with the FTS5 trigram tokenizer
+TRIGRAM_SQLITE_VERSION = (3, 34, 0)
+
+
+def create_search_index(apps, schema_editor):
+    # Older SQLite gets no index: titles are then searched with LIKE.
+    vendor = schema_editor.connection.vendor
+    if (vendor == 'sqlite' and schema_editor.connection.Database
+            .sqlite_version_info >= TRIGRAM_SQLITE_VERSION):
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {SQLITE_TABLE} '
+            "USING fts5(name, tokenize = 'trigram')"
+        )
+        schema_editor.execute(
+            f'INSERT INTO {SQLITE_TABLE} (rowid, name) '
+            f'SELECT id, name FROM api_title'
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX {POSTGRES_INDEX} ON api_title USING GIN '
+            "(to_tsvector('simple'::regconfig, COALESCE(name, '')))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SQLITE_TABLE}')
+    elif vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {POSTGRES_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 3.0.5 on 2026-10-18 20:35
+
+import logging
+
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+
+logger = logging.getLogger(__name__)
+
+
+def drop_duplicate_reviews(apps, schema_editor):
+    """
+    Keeps the first review of every (author, title) pair.
+
+    This loses data: the later duplicates are deleted together with their
+    comments (by cascade). Every deleted review is logged as a warning,
+    with its text and the number of comments deleted with it; back up the
+    api_review and api_comment tables first if they matter.
+    """
+    Review = apps.get_model('api', 'Review')
+    Comment = apps.get_model('api', 'Comment')
+    Title = apps.get_model('api', 'Title')
+    duplicates = Review.objects.values('author_id', 'title_id').annotate(
+        first_id=Min('id'), total=Count('id')
+    ).filter(total__gt=1)
+    for pair in duplicates.iterator():
+        extra = Review.objects.filter(
+            author_id=pair['author_id'], title_id=pair['title_id'],
+            id__gt=pair['first_id']
+        )
+        scores = list(extra.values_list('score', flat=True))
+        for review in extra.values('id', 'text'):
+            logger.warning(
+                'Deleting duplicate review %s of author %s on title %s and '
+                'its %s comments: %r', review['id'], pair['author_id'],
+                pair['title_id'],
+                Comment.objects.filter(review_id=review['id']).count(),
+                review['text']
+            )
+        extra.delete()
+        Title.objects.filter(pk=pair['title_id']).update(
+            rating_sum=F('rating_sum') - sum(scores),
+            rating_count=F('rating_count') - len(scores),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_confirmation_codes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_reviews,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('author', 'title'), name='unique_review_author_title'),
+        ),
+    ]
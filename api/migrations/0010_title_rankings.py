@@ -0,0 +1,64 @@
+# Generated by Django 3.0.5 on 2026-10-18 20:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+PRIOR_COUNT = 10
+
+
+def fill_rankings(apps, schema_editor):
+    Title = apps.get_model('api', 'Title')
+    TitleRanking = apps.get_model('api', 'TitleRanking')
+    totals = Title.objects.aggregate(
+        score_sum=Sum('rating_sum'), score_count=Sum('rating_count')
+    )
+    prior_mean = (totals['score_sum'] / totals['score_count']
+                  if totals['score_count'] else 0.0)
+    rankings = []
+    for title in Title.objects.prefetch_related('genre'):
+        score = ((title.rating_sum + PRIOR_COUNT * prior_mean)
+                 / (title.rating_count + PRIOR_COUNT))
+        scopes = [('all', 0), ('category', title.category_id)]
+        scopes.extend(('genre', genre.pk) for genre in title.genre.all())
+        rankings.extend(
+            TitleRanking(title_id=title.pk, kind=kind, scope_id=scope_id,
+                         weighted_score=score,
+                         review_count=title.rating_count)
+            for kind, scope_id in scopes
+        )
+    TitleRanking.objects.bulk_create(rankings, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_title_score_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('all', 'All'), ('category', 'Category'), ('genre', 'Genre')], max_length=10)),
+                ('scope_id', models.PositiveIntegerField(default=0)),
+                ('weighted_score', models.FloatField()),
+                ('review_count', models.PositiveIntegerField()),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='api.Title')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['kind', 'scope_id', 'weighted_score', 'title'], name='api_titlera_kind_2519e3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['kind', 'scope_id', 'review_count', 'title'], name='api_titlera_kind_830a70_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='titleranking',
+            constraint=models.UniqueConstraint(fields=('title', 'kind', 'scope_id'), name='unique_title_ranking'),
+        ),
+        migrations.RunPython(fill_rankings, migrations.RunPython.noop),
+    ]
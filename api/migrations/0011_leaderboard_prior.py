@@ -0,0 +1,47 @@
+# Generated by Django 3.0.5 on 2026-10-18 21:19
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def store_prior(apps, schema_editor):
+    """Stores the current prior and reweights the existing rows with it,
+    which processes may have computed with different cached priors."""
+    Title = apps.get_model('api', 'Title')
+    TitleRanking = apps.get_model('api', 'TitleRanking')
+    LeaderboardPrior = apps.get_model('api', 'LeaderboardPrior')
+    totals = Title.objects.aggregate(
+        score_sum=Sum('rating_sum'), score_count=Sum('rating_count')
+    )
+    prior_mean = (totals['score_sum'] / totals['score_count']
+                  if totals['score_count'] else 0.0)
+    LeaderboardPrior.objects.create(pk=1, mean=prior_mean)
+    prior_count = settings.LEADERBOARD_PRIOR_COUNT
+    for title in Title.objects.filter(
+        pk__in=TitleRanking.objects.values('title_id')
+    ).values('pk', 'rating_sum', 'rating_count'):
+        TitleRanking.objects.filter(title_id=title['pk']).update(
+            weighted_score=((title['rating_sum'] + prior_count * prior_mean)
+                            / (title['rating_count'] + prior_count))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_title_rankings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardPrior',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mean', models.FloatField()),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(store_prior, migrations.RunPython.noop),
+    ]
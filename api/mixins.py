@@ -1,16 +1,179 @@
+import hashlib
+from urllib.parse import urlsplit, urlunsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date
 from rest_framework import viewsets
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
 
+from .cache import cache_params, get_list_timeout, list_key
+from .compiled import compile_serializer
+from .fieldsets import SparseQuerysetMixin, requested_fields
+from .metrics import record_cache_lookup
+from .pagination import PageNumberOrCursorPagination
 from .permissions import IsAdmin, IsModerator, IsOwner, IsUser
+from .profiling import ProfiledViewMixin
+from .routers import use_replica
+
+
+class CachedListMixin:
+    """
+    Serves `list()` from the cache, keyed by the query params and the
+    model's version counter, which signals bump on every write.
+
+    Pagination links are cached without scheme and host and made absolute
+    again for each request, so clients never get another host's links.
+    Lists read from a replica are not cached: a lagging replica would
+    store rows older than the version they are cached under.
+    """
+    link_fields = ('next', 'previous')
+
+    def list(self, request, *args, **kwargs):
+        key = list_key(self.queryset.model, request.query_params)
+        data = cache.get(key)
+        record_cache_lookup('list', data is not None)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            if not use_replica.get():
+                cache.set(key, self.relative_links(data), get_list_timeout())
+            return Response(data)
+        return Response(self.absolute_links(request, data))
+
+    def relative_links(self, data):
+        if not isinstance(data, dict):
+            return data
+        return {**data, **{
+            field: urlunsplit(('', '') + urlsplit(data[field])[2:])
+            for field in self.link_fields if data.get(field)
+        }}
+
+    def absolute_links(self, request, data):
+        if not isinstance(data, dict):
+            return data
+        return {**data, **{
+            field: request.build_absolute_uri(data[field])
+            for field in self.link_fields if data.get(field)
+        }}
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag/Last-Modified to `list()` and `retrieve()` and answers
+    conditional requests with 304 before anything is serialized.
+
+    Views return the change marker of what they render from
+    `get_last_modified()`; the ETag is derived from that marker and the
+    request, never from the response body.
+    """
+
+    def get_last_modified(self):
+        return None
+
+    def get_etag(self, request, last_modified):
+        params = cache_params(request.query_params)
+        source = (f'{last_modified.isoformat()}|{request.path}|{params}|'
+                  f'{request.accepted_media_type}')
+        return '"{}"'.format(hashlib.md5(source.encode()).hexdigest())
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        last_modified = self.get_last_modified()
+        if last_modified is None:
+            return handler(request, *args, **kwargs)
+        etag = self.get_etag(request, last_modified)
+        timestamp = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request._request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request,
+                                         *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request,
+                                         *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response,
+                                             *args, **kwargs)
+        if request.method in ('GET', 'HEAD'):
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(
+                    response, public=True,
+                    max_age=settings.API_HTTP_CACHE_MAX_AGE
+                )
+            patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+
+class CompiledReadMixin:
+    """
+    Serves `list()` and `retrieve()` from `values()` rows through the
+    compiled form of the read serializer, skipping model instances and
+    per-field serializer calls. Set `compiled_reads = False` on a viewset
+    to fall back to the regular serializer.
+
+    Object permissions of `retrieve()` receive the row dict.
+    """
+    compiled_reads = True
+
+    def get_compiled_serializer(self):
+        serializer_class = self.get_serializer_class()
+        return compile_serializer(
+            serializer_class, requested_fields(self.request, serializer_class)
+        )
+
+    def get_values_queryset(self, compiled):
+        extra = [field.lstrip('-')
+                 for field in getattr(self, 'cursor_ordering', ())]
+        return compiled.values(self.filter_queryset(self.get_queryset()),
+                               *extra)
+
+    def list(self, request, *args, **kwargs):
+        if not self.compiled_reads:
+            return super().list(request, *args, **kwargs)
+        compiled = self.get_compiled_serializer()
+        queryset = self.get_values_queryset(compiled)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.serialize(page))
+        return Response(compiled.serialize(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.compiled_reads:
+            return super().retrieve(request, *args, **kwargs)
+        compiled = self.get_compiled_serializer()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(self.get_values_queryset(compiled), **{
+            self.lookup_field: self.kwargs[lookup_url_kwarg]
+        })
+        self.check_object_permissions(request, row)
+        return Response(compiled.serialize([row])[0])
 
 
-class ReviewCommentMixin(viewsets.ModelViewSet):
+class ReviewCommentMixin(ProfiledViewMixin, ConditionalGetMixin,
+                         CompiledReadMixin, SparseQuerysetMixin,
+                         viewsets.ModelViewSet):
     permission_classes = [IsOwner]
     permission_classes_by_action = {'list': [AllowAny],
                                     'create': [IsUser | IsAdmin | IsModerator],
                                     'retrieve': [AllowAny],
                                     'partial_update': [IsOwner],
                                     'destroy': [IsAdmin | IsModerator]}
+    pagination_class = PageNumberOrCursorPagination
+    cursor_ordering = ('-pub_date', '-id')
 
     def get_permissions(self):
         try:
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -35,6 +36,17 @@ class Title(models.Model):
         on_delete=models.PROTECT,
         related_name='categories'
     )
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    modified = models.DateTimeField(auto_now=True)
+    reviews_modified = models.DateTimeField(default=timezone.now,
+                                            editable=False)
+
+    @property
+    def rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
 
 
 class User(AbstractUser):
@@ -51,14 +63,20 @@ class User(AbstractUser):
         choices=Role.choices,
         default=Role.USER,
         )
-    confirmation_code = models.CharField(max_length=100, blank=True, )
 
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_username = instance.__dict__.get('username')
+        return instance
+
 
 class Review(models.Model):
-    SCORE_CHOICES = zip(range(1, 11), range(1, 11))
+    SCORES = range(1, 11)
+    SCORE_CHOICES = zip(SCORES, SCORES)
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
@@ -75,6 +93,26 @@ class Review(models.Model):
         'Дата публикации отзыва',
         auto_now_add=True,
     )
+    comments_modified = models.DateTimeField(default=timezone.now,
+                                             editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=['title', 'pub_date', 'id'])]
+        constraints = [
+            models.UniqueConstraint(fields=['author', 'title'],
+                                    name='unique_review_author_title'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # post_save updates Title.rating_*, keep both in one transaction
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
 
 
 class Comment(models.Model):
@@ -93,3 +131,100 @@ class Comment(models.Model):
         'Дата публикации комментария',
         auto_now_add=True
     )
+
+    class Meta:
+        indexes = [models.Index(fields=['review', 'pub_date', 'id'])]
+
+
+class TitleScoreCount(models.Model):
+    """Number of reviews with `score` for `title`; one row per pair."""
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='score_counts'
+    )
+    score = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'score'],
+                                    name='unique_title_score_count'),
+        ]
+
+
+class TitleRanking(models.Model):
+    """
+    Materialized leaderboard row: a title's Bayesian-weighted score and
+    review count within one scope (all titles, a category or a genre).
+    """
+
+    class Kind(models.TextChoices):
+        ALL = 'all', _('All')
+        CATEGORY = 'category', _('Category')
+        GENRE = 'genre', _('Genre')
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='rankings'
+    )
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    scope_id = models.PositiveIntegerField(default=0)
+    weighted_score = models.FloatField()
+    review_count = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'scope_id', 'weighted_score',
+                                 'title']),
+            models.Index(fields=['kind', 'scope_id', 'review_count',
+                                 'title']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'kind', 'scope_id'],
+                                    name='unique_title_ranking'),
+        ]
+
+
+class LeaderboardPrior(models.Model):
+    """
+    Single row holding the mean score the stored TitleRanking scores are
+    weighted with. Every process reads it from here, so the rankings never
+    mix priors; `rebuild_leaderboards` replaces it with the rows.
+    """
+    SINGLETON_PK = 1
+
+    mean = models.FloatField()
+    computed_at = models.DateTimeField(default=timezone.now)
+
+
+class OutboxEmail(models.Model):
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    queued_at = models.DateTimeField(default=timezone.now)
+    next_attempt_at = models.DateTimeField(default=timezone.now, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['sent_at', 'next_attempt_at'])]
+        constraints = [
+            # one pending message per address: repeated requests replace it
+            models.UniqueConstraint(
+                fields=['to_email'], condition=models.Q(sent_at=None),
+                name='unique_pending_outbox_email'
+            ),
+        ]
+
+
+class ConfirmationCode(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='confirmation_codes'
+    )
+    code_hash = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
@@ -0,0 +1,139 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination positioned on every field of `ordering`, which must
+    end with a unique field. DRF's own cursor only compares the first
+    field and pages through equal values by OFFSET; here the page after
+    (pub_date, id) is read with `(pub_date, id) < (%s, %s)`, spelled
+    `pub_date <= %s AND (pub_date < %s OR (pub_date = %s AND id < %s))`,
+    which every supported database and Django 3.0 can express.
+    """
+    ordering = '-id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*(
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in self.ordering
+            ))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            try:
+                queryset = queryset.filter(self.after(
+                    self.decode_position(current_position), reverse
+                ))
+            except (ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # one extra row tells whether there is a following page
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            following_position = None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def after(self, values, reverse):
+        """Q of the rows past `values` in the (possibly reversed)
+        ordering."""
+        fields = [(field.lstrip('-'), field.startswith('-') != reverse)
+                  for field in self.ordering]
+        condition = None
+        for (name, descending), value in reversed(list(zip(fields, values))):
+            past = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+            condition = past if condition is None else (
+                past | Q(**{name: value}) & condition
+            )
+        # redundant, but lets the database range-scan the leading column
+        name, descending = fields[0]
+        lookup = 'lte' if descending else 'gte'
+        return Q(**{f'{name}__{lookup}': values[0]}) & condition
+
+    def decode_position(self, position):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            values.append(str(instance[name] if isinstance(instance, dict)
+                              else getattr(instance, name)))
+        return json.dumps(values)
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+    Page number pagination unless the client asks for `?pagination=cursor`,
+    in which case pages are fetched by keyset over the view's
+    `cursor_ordering` and no COUNT(*) or OFFSET scan is issued.
+    """
+    pagination_mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.pagination_mode_query_param)
+            == self.cursor_mode
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if not self.use_cursor(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = KeysetPagination()
+        self.cursor_paginator.ordering = getattr(
+            view, 'cursor_ordering', KeysetPagination.ordering
+        )
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,187 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+current_profile = ContextVar('current_profile', default=None)
+
+# Server-Timing metric names, in the order they are reported.
+PHASES = ('db', 'auth', 'serialize', 'render')
+
+# `?profile=1` asks for a profile; it never changes the response body.
+PROFILE_PARAM = 'profile'
+
+
+class Profile:
+    """Time spent by one request, split into PHASES.
+
+    Phase times are exclusive: SQL run inside a phase counts as `db` only.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = None
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+        self.active = None
+
+    def execute(self, execute, sql, params, many, context):
+        """execute_wrapper timing every query of the request."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.phases['db'] += time.perf_counter() - started
+            self.queries += 1
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def server_timing(self):
+        metrics = [f'{name};dur={self.phases[name] * 1000:.2f}'
+                   for name in PHASES]
+        metrics[0] += f';desc="{self.queries} queries"'
+        metrics.append(f'total;dur={self.total * 1000:.2f}')
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        timings = {name: round(self.phases[name] * 1000, 3)
+                   for name in PHASES}
+        timings['total'] = round(self.total * 1000, 3)
+        return {'queries': self.queries, 'ms': timings}
+
+
+@contextmanager
+def phase(name):
+    """Adds the time of the block to the current request's `name` phase.
+    Without a profile, or inside another phase, this is a no-op."""
+    profile = current_profile.get()
+    if profile is None or profile.active is not None:
+        yield
+        return
+    profile.active = name
+    db_before = profile.phases['db']
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.phases[name] += (time.perf_counter() - started
+                                 - (profile.phases['db'] - db_before))
+        profile.active = None
+
+
+class ProfiledViewMixin:
+    """Counts DRF authentication, permission and throttle checks as the
+    `auth` phase."""
+
+    def initial(self, request, *args, **kwargs):
+        with phase('auth'):
+            super().initial(request, *args, **kwargs)
+
+    def check_object_permissions(self, request, obj):
+        with phase('auth'):
+            super().check_object_permissions(request, obj)
+
+
+class ProfiledSerializerMixin:
+    """Counts to_representation() of a serializer as the `serialize` phase;
+    for a list, every top-level item is timed."""
+
+    def to_representation(self, instance):
+        with phase('serialize'):
+            return super().to_representation(instance)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a PROFILING_SAMPLE_RATE share of requests into the
+    `api.profiling` log, and requests of staff with `?profile=1`. Those
+    see the breakdown in a `Server-Timing` header, plus a `_profile` field
+    in JSON objects when PROFILING_DEBUG_FIELD is set; `?profile=1` from
+    anyone else is ignored.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = (settings.PROFILING_SAMPLE_RATE > 0
+                   and random.random() < settings.PROFILING_SAMPLE_RATE)
+        requested = (request.GET.get(PROFILE_PARAM) == '1'
+                     and self.can_see_profile(request))
+        if not (sampled or requested):
+            return self.get_response(request)
+
+        profile = Profile()
+        token = current_profile.set(profile)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(profile.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        profile.finish()
+
+        if sampled:
+            logger.info(json.dumps(dict(
+                profile.as_dict(), method=request.method,
+                path=request.get_full_path(), status=response.status_code,
+            )))
+        if requested:
+            response['Server-Timing'] = profile.server_timing()
+            if settings.PROFILING_DEBUG_FIELD:
+                self.add_debug_field(response, profile)
+        return response
+
+    def can_see_profile(self, request):
+        user = self.authenticate(request)
+        return bool(user and (user.is_staff or user.role == 'admin'))
+
+    def authenticate(self, request):
+        """The user of the session or of the API credentials, or None;
+        DRF authenticates only inside the view, too late to decide."""
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user
+        for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            try:
+                result = authenticator().authenticate(request)
+            except APIException:
+                return None
+            if result is not None:
+                return result[0]
+        return None
+
+    def process_template_response(self, request, response):
+        profile = current_profile.get()
+        if profile is None:
+            return response
+        started = time.perf_counter()
+
+        def rendered(response):
+            profile.phases['render'] += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def add_debug_field(self, response, profile):
+        if (response.streaming
+                or not response.get('Content-Type', '').startswith(
+                    'application/json')):
+            return
+        data = json.loads(response.content)
+        if isinstance(data, dict):
+            data['_profile'] = profile.as_dict()
+            response.content = json.dumps(data, ensure_ascii=False)
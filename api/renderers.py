@@ -0,0 +1,41 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # rendered by the stdlib json module instead
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson when it is installed.
+
+    Dates, times, Decimals, lazy strings and anything else orjson does not
+    handle the way DRF does go through DRF's JSONEncoder.default(), so the
+    output matches JSONRenderer's byte for byte. Indented output, ASCII or
+    non-compact settings and values orjson rejects, such as integers
+    beyond 64 bits, are rendered by JSONRenderer itself.
+
+    Known differences: floats that Python writes with an exponent are
+    spelled without `+` or leading zeros (`1e16`, not `1e+16`), and NaN
+    or infinite floats become `null` instead of raising.
+    """
+    option = (orjson.OPT_PASSTHROUGH_DATETIME
+              | orjson.OPT_PASSTHROUGH_DATACLASS if orjson else 0)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii
+                or not self.compact or self.get_indent(
+                    accepted_media_type, renderer_context or {}
+                ) is not None):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default,
+                               option=self.option)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        # escaped like JSONRenderer does, to stay a JavaScript subset
+        return (ret.replace('\u2028'.encode(), b'\\u2028')
+                .replace('\u2029'.encode(), b'\\u2029'))
@@ -0,0 +1,132 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Title
+
+
+class ContainsSearchBackend:
+    """Unindexed `name LIKE '%value%'` search, used when nothing better is
+    available for the current database."""
+
+    def search(self, queryset, value):
+        return queryset.filter(name__contains=value)
+
+    def index(self, title):
+        pass
+
+    def remove(self, title_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class SQLiteFTSSearchBackend(ContainsSearchBackend):
+    """
+    FTS5 virtual table with the trigram tokenizer, so substring matches
+    keep the `contains` semantics. The table is created by migration
+    0004_title_search and maintained from Title save/delete signals.
+    """
+    table = 'api_title_fts'
+    min_length = 3
+    # first SQLite release with the trigram tokenizer
+    min_sqlite_version = (3, 34, 0)
+
+    @classmethod
+    def is_available(cls, connection):
+        """Whether `connection` has the table and can run its tokenizer."""
+        return (connection.vendor == 'sqlite'
+                and connection.Database.sqlite_version_info
+                >= cls.min_sqlite_version
+                and cls.table in connection.introspection.table_names())
+
+    def search(self, queryset, value):
+        if len(value) < self.min_length:
+            return super().search(queryset, value)
+        match = '"{}"'.format(value.replace('"', '""'))
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s',
+            (match, )
+        )).annotate(search_rank=RawSQL(
+            f'SELECT rank FROM {self.table} '
+            f'WHERE {self.table} MATCH %s '
+            f'AND rowid = {Title._meta.db_table}.id',
+            (match, )
+        )).order_by('search_rank', 'pk')
+
+    def index(self, title):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [title.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, name) VALUES (%s, %s)',
+                [title.pk, title.name]
+            )
+
+    def remove(self, title_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [title_id]
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, name) '
+                f'SELECT id, name FROM {Title._meta.db_table}'
+            )
+
+
+class PostgresSearchBackend(ContainsSearchBackend):
+    """
+    Ranked prefix search over `to_tsvector('simple', name)`, backed by the
+    GIN expression index from migration 0004_title_search. Postgres keeps
+    that index current on every Title write.
+    """
+    config = 'simple'
+
+    def search(self, queryset, value):
+        from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                                    SearchVector)
+
+        terms = re.findall(r'\w+', value)
+        if not terms:
+            return super().search(queryset, value)
+        vector = SearchVector('name', config=self.config)
+        query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            config=self.config, search_type='raw'
+        )
+        return queryset.annotate(
+            search_vector=vector, search_rank=SearchRank(vector, query)
+        ).filter(search_vector=query).order_by('-search_rank', 'pk')
+
+
+def _default_backend_class():
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend
+    if SQLiteFTSSearchBackend.is_available(connection):
+        return SQLiteFTSSearchBackend
+    return ContainsSearchBackend
+
+
+# backends by the setting and database they were chosen for, so switching
+# either (test databases, override_settings) picks a new one
+_backends = {}
+
+
+def get_search_backend():
+    backend_path = getattr(settings, 'TITLE_SEARCH_BACKEND', None)
+    key = (backend_path, connection.alias, connection.vendor,
+           connection.settings_dict['NAME'])
+    if key not in _backends:
+        backend_class = (import_string(backend_path) if backend_path
+                         else _default_backend_class())
+        _backends[key] = backend_class()
+    return _backends[key]
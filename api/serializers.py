@@ -1,15 +1,19 @@
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.http import Http404
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from .authentication import add_user_claims
+from .fieldsets import SparseFieldsetMixin
 from .models import Category, Comment, Genre, Review, Title
+from .profiling import ProfiledSerializerMixin
+from .utils import consume_confirmation_code
 
 User = get_user_model()
 
 
 def get_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
+    refresh = add_user_claims(RefreshToken.for_user(user), user)
 
     return {
         'refresh': str(refresh),
@@ -22,14 +26,16 @@ class EmailAuthSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField(max_length=100)
 
     def validate(self, data):
-        user = get_object_or_404(
-            User, confirmation_code=data['confirmation_code'],
-            email=data['email']
+        user = consume_confirmation_code(
+            data['email'], data['confirmation_code']
         )
+        if user is None:
+            raise Http404
         return get_tokens_for_user(user)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ProfiledSerializerMixin, SparseFieldsetMixin,
+                     serializers.ModelSerializer):
 
     class Meta:
         fields = ('first_name', 'last_name', 'username',
@@ -37,7 +43,7 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         fields = ('name', 'slug',)
@@ -45,7 +51,7 @@ class GenreSerializer(serializers.ModelSerializer):
         model = Genre
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         fields = ('name', 'slug',)
@@ -53,10 +59,9 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
-    rating = serializers.IntegerField(
-        source='reviews__score__avg', read_only=True
-    )
+class TitleReadSerializer(ProfiledSerializerMixin, SparseFieldsetMixin,
+                          serializers.ModelSerializer):
+    rating = serializers.IntegerField(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
     category = CategorySerializer(read_only=True)
 
@@ -64,6 +69,8 @@ class TitleReadSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'year', 'rating',
                   'description', 'genre', 'category')
         model = Title
+        # columns read by the `rating` property, for compiled reads
+        values_sources = {'rating': ('rating_sum', 'rating_count')}
 
 
 class TitleWriteSerializer(serializers.ModelSerializer):
@@ -79,7 +86,8 @@ class TitleWriteSerializer(serializers.ModelSerializer):
         model = Title
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(ProfiledSerializerMixin, SparseFieldsetMixin,
+                       serializers.ModelSerializer):
     author = serializers.SlugRelatedField(slug_field='username',
                                           read_only=True)
 
@@ -87,23 +95,9 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'author', 'score', 'pub_date')
         model = Review
 
-    def validate(self, data):
-        super().validate(data)
-
-        if self.context['request'].method != 'POST':
-            return data
-
-        user = self.context['request'].user
-        title_id = (
-            self.context['request'].parser_context['kwargs']['title_id']
-        )
-        if Review.objects.filter(author=user, title__id=title_id).exists():
-            raise serializers.ValidationError(
-                    "Вы уже оставили отзыв на данное произведение")
-        return data
-
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(ProfiledSerializerMixin, SparseFieldsetMixin,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(slug_field='username',
                                           read_only=True)
 
@@ -0,0 +1,187 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import Count, F, Sum
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .authentication import remember_user
+from .cache import bump_version
+from .leaderboards import sync_title_rankings, update_title_rankings
+from .models import (Category, Comment, Genre, Review, Title,
+                     TitleRanking, TitleScoreCount, User)
+from .search import get_search_backend
+from .slow_queries import install as install_slow_query_capture
+
+
+def touch_title_reviews(title_id):
+    Title.objects.filter(pk=title_id).update(
+        reviews_modified=timezone.now()
+    )
+
+
+def update_title_rating(title_id, score_delta, count_delta):
+    now = timezone.now()
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + score_delta,
+        rating_count=F('rating_count') + count_delta,
+        modified=now,
+        reviews_modified=now,
+    )
+
+
+def recalculate_title_rating(title_id):
+    totals = Review.objects.filter(title_id=title_id).aggregate(
+        score_sum=Sum('score'), score_count=Count('id')
+    )
+    now = timezone.now()
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=totals['score_sum'] or 0,
+        rating_count=totals['score_count'],
+        modified=now,
+        reviews_modified=now,
+    )
+
+
+def update_score_count(title_id, score, delta):
+    counts = TitleScoreCount.objects.filter(title_id=title_id, score=score)
+    if not counts.update(count=F('count') + delta) and delta > 0:
+        TitleScoreCount.objects.bulk_create([
+            TitleScoreCount(title_id=title_id, score=score)
+            for score in Review.SCORES
+        ], ignore_conflicts=True)
+        counts.update(count=F('count') + delta)
+
+
+def recalculate_score_counts(title_id):
+    TitleScoreCount.objects.filter(title_id=title_id).delete()
+    TitleScoreCount.objects.bulk_create([
+        TitleScoreCount(title_id=title_id, **row)
+        for row in Review.objects.filter(title_id=title_id).values(
+            'score'
+        ).annotate(count=Count('id')).order_by()
+    ])
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    loaded_score = getattr(instance, '_loaded_score', None)
+    instance._loaded_score = instance.score
+    if created:
+        update_title_rating(instance.title_id, instance.score, 1)
+        update_score_count(instance.title_id, instance.score, 1)
+    elif loaded_score is None:
+        recalculate_title_rating(instance.title_id)
+        recalculate_score_counts(instance.title_id)
+    elif loaded_score != instance.score:
+        update_title_rating(instance.title_id,
+                            instance.score - loaded_score, 0)
+        update_score_count(instance.title_id, loaded_score, -1)
+        update_score_count(instance.title_id, instance.score, 1)
+    else:
+        touch_title_reviews(instance.title_id)
+        return
+    update_title_rankings(instance.title_id)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    update_title_rating(instance.title_id, -instance.score, -1)
+    update_score_count(instance.title_id, instance.score, -1)
+    update_title_rankings(instance.title_id)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, **kwargs):
+    get_search_backend().index(instance)
+    sync_title_rankings(instance.pk)
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def lookup_changed(sender, using, **kwargs):
+    # after the commit, so no reader caches the old rows under the new
+    # version while the write is still invisible to it
+    transaction.on_commit(lambda: bump_version(sender), using=using)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if action.startswith('pre_'):
+        if action == 'pre_clear' and reverse:
+            # pk_set is not provided for clear, remember the titles now
+            instance._cleared_title_ids = list(
+                Title.objects.filter(genre=instance).values_list(
+                    'pk', flat=True
+                )
+            )
+        return
+    if not reverse:
+        title_ids = [instance.pk]
+    elif pk_set is not None:
+        title_ids = list(pk_set)
+    else:
+        title_ids = getattr(instance, '_cleared_title_ids', [])
+    Title.objects.filter(pk__in=title_ids).update(modified=timezone.now())
+    for title_id in title_ids:
+        sync_title_rankings(title_id)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def genre_changed(sender, instance, **kwargs):
+    Title.objects.filter(genre=instance).update(modified=timezone.now())
+
+
+@receiver(post_delete, sender=Genre)
+def genre_deleted(sender, instance, **kwargs):
+    TitleRanking.objects.filter(
+        kind=TitleRanking.Kind.GENRE, scope_id=instance.pk
+    ).delete()
+
+
+@receiver(post_save, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    Title.objects.filter(category=instance).update(modified=timezone.now())
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    Review.objects.filter(pk=instance.review_id).update(
+        comments_modified=timezone.now()
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    remember_user(instance)
+    loaded_username = getattr(instance, '_loaded_username', None)
+    if not created and loaded_username != instance.username:
+        now = timezone.now()
+        Title.objects.filter(reviews__author=instance).update(
+            reviews_modified=now
+        )
+        Review.objects.filter(comments__author=instance).update(
+            comments_modified=now
+        )
+    instance._loaded_username = instance.username
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    remember_user(instance, deleted=True)
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    install_slow_query_capture(connection)
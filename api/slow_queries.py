@@ -0,0 +1,110 @@
+import hashlib
+import json
+import logging
+import re
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .metrics import current_request, view_label
+
+logger = logging.getLogger(__name__)
+
+# Per-process memory of explained fingerprints, bounded.
+MAX_EXPLAINED = 10000
+
+NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+explaining = ContextVar('explaining', default=False)
+explained = set()
+
+
+def normalize(sql):
+    """SQL with literals, placeholders and IN lists collapsed, so that
+    queries differing only in their values share a fingerprint."""
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.md5(normalized_sql.encode()).hexdigest()[:16]
+
+
+def explain(connection, sql, params):
+    """
+    The plan of a SELECT as text, or None.
+
+    EXPLAIN runs in a savepoint, so when it fails inside the caller's
+    transaction only the savepoint is rolled back; on Postgres the
+    transaction would otherwise be aborted.
+    """
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    token = explaining.set(True)
+    try:
+        with transaction.atomic(using=connection.alias, savepoint=True), \
+                connection.cursor() as cursor:
+            cursor.execute(
+                f'{connection.ops.explain_query_prefix()} {sql}', params
+            )
+            rows = cursor.fetchall()
+    except DatabaseError:
+        return None
+    finally:
+        explaining.reset(token)
+    return '\n'.join(' '.join(map(str, row)) for row in rows)
+
+
+def capture_slow_query(execute, sql, params, many, context):
+    """execute_wrapper logging statements slower than SLOW_QUERY_MS to the
+    `api.slow_queries` log, with the plan of each new fingerprint."""
+    threshold = settings.SLOW_QUERY_MS
+    if not threshold or explaining.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    elapsed = (time.perf_counter() - started) * 1000
+    if elapsed < threshold:
+        return result
+
+    connection = context['connection']
+    normalized = normalize(sql)
+    key = fingerprint(normalized)
+    record = {
+        'at': timezone.now().isoformat(),
+        'fingerprint': key,
+        'sql': normalized,
+        'ms': round(elapsed, 3),
+        'alias': connection.alias,
+        'view': None,
+    }
+    request = current_request.get()
+    if request is not None:
+        record['view'] = view_label(request)
+    if settings.SLOW_QUERY_STATEMENTS and not many:
+        # with its values, so `advise_indexes` can replay it
+        record['statement'] = connection.ops.last_executed_query(
+            context['cursor'].cursor, sql, params
+        )
+    if key not in explained and not many:
+        if len(explained) >= MAX_EXPLAINED:
+            explained.clear()
+        explained.add(key)
+        record['plan'] = explain(connection, sql, params)
+    logger.warning(json.dumps(record, ensure_ascii=False))
+    return result
+
+
+def install(connection):
+    if capture_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(capture_slow_query)
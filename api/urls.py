@@ -1,12 +1,12 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import (TokenObtainPairView,
                                             TokenRefreshView)
 
 from .serializers import EmailAuthSerializer
 from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    ReviewViewSet, TitleViewSet, UserViewSet,
-                    send_confirmation_code)
+                    ReviewViewSet, TitleViewSet, UserViewSet, export,
+                    leaderboard, metrics, send_confirmation_code)
 
 v1_router = DefaultRouter()
 v1_router.register('genres', GenreViewSet, basename='genres')
@@ -38,5 +38,10 @@ v1_auth_patterns = [
 
 urlpatterns = [
     path('v1/auth/', include(v1_auth_patterns)),
+    re_path(r'^v1/export/(?P<name>titles|reviews|comments)/$', export,
+            name='export'),
+    re_path(r'^v1/leaderboards/(?P<board>top-rated|most-reviewed)/$',
+            leaderboard, name='leaderboard'),
+    path('v1/metrics/', metrics, name='metrics'),
     path('v1/', include(v1_router.urls))
 ]
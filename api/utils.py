@@ -1,8 +1,14 @@
-from django.core import mail
+import hashlib
+import hmac
+import secrets
+
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 
-from api_yamdb.settings import NOREPLY_YAMDB_EMAIL
+from .models import ConfirmationCode, OutboxEmail
 
 
 def email_is_valid(email):
@@ -13,13 +19,79 @@ def email_is_valid(email):
         return False
 
 
+def queue_mail(to_email, subject, body):
+    """Puts a message into the outbox; `manage.py send_outbox` delivers it.
+
+    A message still pending for the same address is replaced instead of
+    queueing a second one."""
+    while True:
+        try:
+            with transaction.atomic():
+                OutboxEmail.objects.create(
+                    to_email=to_email, subject=subject, body=body
+                )
+            return
+        except IntegrityError:
+            now = timezone.now()
+            if OutboxEmail.objects.filter(
+                to_email=to_email, sent_at__isnull=True
+            ).update(subject=subject, body=body, queued_at=now,
+                     next_attempt_at=now, attempts=0, last_error=''):
+                return
+            # the pending message was sent in between, queue a new one
+
+
+def violates_constraint(error, model, name):
+    """Whether IntegrityError `error` comes from the unique constraint
+    `name` of `model`. Postgres reports the constraint name, SQLite only
+    the columns of the constraint."""
+    diag = getattr(error.__cause__, 'diag', None)
+    if diag is not None:
+        return diag.constraint_name == name
+    constraint = next(constraint for constraint in model._meta.constraints
+                      if constraint.name == name)
+    columns = ', '.join(
+        f'{model._meta.db_table}.{model._meta.get_field(field).column}'
+        for field in constraint.fields
+    )
+    return str(error) == f'UNIQUE constraint failed: {columns}'
+
+
 def generate_mail(to_email, code):
     subject = 'Confirmation code для YaMDB'
-    to = to_email
     text_content = f'''Вы запросили confirmation code для работы с API YaMDB.\n
                         Внимание, храните его в тайне {code}'''
-    mail.send_mail(
-        subject, text_content,
-        NOREPLY_YAMDB_EMAIL, [to],
-        fail_silently=False
+    queue_mail(to_email, subject, text_content)
+
+
+def hash_confirmation_code(code):
+    return hmac.new(settings.SECRET_KEY.encode(), code.encode(),
+                    hashlib.sha256).hexdigest()
+
+
+def issue_confirmation_code(user_id):
+    code = secrets.token_urlsafe(24)
+    ConfirmationCode.objects.create(
+        user_id=user_id, code_hash=hash_confirmation_code(code),
+        expires_at=timezone.now() + settings.CONFIRMATION_CODE_LIFETIME
     )
+    return code
+
+
+def consume_confirmation_code(email, code):
+    """Returns the code owner with the fields needed for token claims, or
+    None. A consumed code and every other code of its user are deleted."""
+    confirmation = ConfirmationCode.objects.filter(
+        code_hash=hash_confirmation_code(code),
+        expires_at__gt=timezone.now(),
+        user__email=email,
+    ).select_related('user').only(
+        'user_id', 'user__username', 'user__role', 'user__is_staff'
+    ).first()
+    if confirmation is None:
+        return None
+    deleted, _ = ConfirmationCode.objects.filter(
+        user_id=confirmation.user_id
+    ).delete()
+    # a concurrent request consumed it first
+    return confirmation.user if deleted else None
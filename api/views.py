@@ -1,33 +1,47 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, mixins, viewsets
+from rest_framework import filters, mixins, status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from .exports import EXPORT_FORMATS, EXPORT_ROWS, export_response
+from .fieldsets import SparseQuerysetMixin
 from .filters import TitleFilter
-from .mixins import ReviewCommentMixin
-from .models import Category, Comment, Genre, Review, Title
+from .leaderboards import BOARDS
+from .metrics import get_registry
+from .mixins import (CachedListMixin, CompiledReadMixin,
+                     ConditionalGetMixin, ReviewCommentMixin)
+from .models import (Category, Comment, Genre, Review, Title,
+                     TitleRanking, TitleScoreCount)
+from .pagination import PageNumberOrCursorPagination
 from .permissions import IsAdmin, IsAdminUserOrReadOnly
+from .profiling import ProfiledViewMixin
 from .serializers import (CategorySerializer, CommentSerializer,
                           GenreSerializer, ReviewSerializer,
                           TitleReadSerializer, TitleWriteSerializer,
                           UserSerializer)
-from .utils import email_is_valid, generate_mail
+from .utils import (email_is_valid, generate_mail, issue_confirmation_code,
+                    violates_constraint)
 
 User = get_user_model()
 
 
-class CDLViewSet(mixins.CreateModelMixin,
+class CDLViewSet(ProfiledViewMixin,
+                 CachedListMixin,
+                 mixins.CreateModelMixin,
                  mixins.DestroyModelMixin,
                  mixins.ListModelMixin,
                  viewsets.GenericViewSet):
     """
     A viewset that provides default `create()`, `destroy()`
-    and `list()` actions.
+    and cached `list()` actions.
     """
     pass
 
@@ -50,11 +64,24 @@ class CategoryViewSet(CDLViewSet):
     search_fields = ['=name', ]
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ProfiledViewMixin, ConditionalGetMixin,
+                   CompiledReadMixin, SparseQuerysetMixin,
+                   viewsets.ModelViewSet):
     permission_classes = [IsAdminUserOrReadOnly, ]
-    queryset = Title.objects.all().annotate(Avg('reviews__score'))
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    )
     filter_backends = [DjangoFilterBackend]
     filterset_class = TitleFilter
+    pagination_class = PageNumberOrCursorPagination
+    cursor_ordering = ('-id', )
+
+    def get_last_modified(self):
+        if self.action != 'retrieve' or not self.kwargs['pk'].isdigit():
+            return None
+        return Title.objects.filter(pk=self.kwargs['pk']).values_list(
+            'modified', flat=True
+        ).first()
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
@@ -62,8 +89,28 @@ class TitleViewSet(viewsets.ModelViewSet):
 
         return TitleWriteSerializer
 
+    @action(methods=['get'], detail=True,
+            url_path='rating-distribution', url_name='rating-distribution')
+    def rating_distribution(self, request, pk=None):
+        if not pk.isdigit():
+            raise Http404
+        counts = dict(TitleScoreCount.objects.filter(
+            title_id=pk
+        ).values_list('score', 'count'))
+        if not counts:
+            get_object_or_404(Title, pk=pk)
+        return Response({
+            'id': int(pk),
+            'count': sum(counts.values()),
+            'distribution': [
+                {'score': score, 'count': counts.get(score, 0)}
+                for score in Review.SCORES
+            ],
+        })
+
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ProfiledViewMixin, SparseQuerysetMixin,
+                  viewsets.ModelViewSet):
     queryset = User.objects.all()
     permission_classes = [IsAdminUser | IsAdmin]
     serializer_class = UserSerializer
@@ -75,7 +122,7 @@ class UserViewSet(viewsets.ModelViewSet):
             permission_classes=[IsAuthenticated],
             url_path='me', url_name='me')
     def me(self, request, *args, **kwargs):
-        instance = self.request.user
+        instance = User.objects.get(pk=self.request.user.pk)
         serializer = self.get_serializer(instance)
         if self.request.method == 'PATCH':
             serializer = self.get_serializer(
@@ -93,26 +140,102 @@ def send_confirmation_code(request):
         message = 'Email is required'
     else:
         if email_is_valid(email):
-            user = get_object_or_404(User, email=email)
-            confirmation_code = default_token_generator.make_token(user)
+            user_id = get_object_or_404(
+                User.objects.values_list('pk', flat=True), email=email
+            )
+            confirmation_code = issue_confirmation_code(user_id)
             generate_mail(email, confirmation_code)
-            user.confirmation_code = confirmation_code
             message = email
-            user.save()
         else:
             message = 'Valid email is required'
     return Response({'email': message})
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser | IsAdmin])
+def metrics(request):
+    return HttpResponse(get_registry().exposition(),
+                        content_type='text/plain; version=0.0.4; '
+                                     'charset=utf-8')
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser | IsAdmin])
+def export(request, name):
+    output = request.query_params.get('output', 'ndjson')
+    if output not in EXPORT_FORMATS:
+        return Response(
+            {'output': f'Supported formats: {", ".join(EXPORT_FORMATS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return export_response(name, EXPORT_ROWS[name](), output)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def leaderboard(request, board):
+    try:
+        limit = min(int(request.query_params.get('limit', 10)),
+                    settings.LEADERBOARD_MAX_LIMIT)
+    except ValueError:
+        return Response({'limit': 'A valid integer is required.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    kind, scope_id = TitleRanking.Kind.ALL, 0
+    for scope_kind, model in ((TitleRanking.Kind.CATEGORY, Category),
+                              (TitleRanking.Kind.GENRE, Genre)):
+        slug = request.query_params.get(scope_kind)
+        if slug:
+            kind = scope_kind
+            scope_id = get_object_or_404(
+                model.objects.values_list('pk', flat=True), slug=slug
+            )
+    rankings = TitleRanking.objects.filter(
+        kind=kind, scope_id=scope_id
+    ).order_by(*BOARDS[board]).select_related(
+        'title__category'
+    ).prefetch_related('title__genre')[:max(limit, 0)]
+    titles = TitleReadSerializer(
+        [ranking.title for ranking in rankings], many=True
+    ).data
+    return Response([
+        {'rank': rank, 'weighted_score': ranking.weighted_score,
+         'review_count': ranking.review_count, 'title': title}
+        for rank, (ranking, title) in enumerate(zip(rankings, titles), 1)
+    ])
+
+
 class ReviewViewSet(ReviewCommentMixin):
     serializer_class = ReviewSerializer
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        # Title existence and the one-review-per-author rule are both
+        # enforced by the insert itself (FK and unique constraint).
+        # The savepoint keeps the request's transaction usable after a
+        # failed insert on Postgres.
+        title_id = self.kwargs.get('title_id')
+        try:
+            with transaction.atomic():
+                serializer.save(author=self.request.user, title_id=title_id)
+        except IntegrityError as error:
+            if not violates_constraint(error, Review,
+                                       'unique_review_author_title'):
+                get_object_or_404(Title, pk=title_id)
+                raise
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Вы уже оставили отзыв на данное произведение'
+            ]})
+
+    def get_last_modified(self):
+        if self.action != 'list':
+            return None
+        return Title.objects.filter(
+            pk=self.kwargs.get('title_id')
+        ).values_list('reviews_modified', flat=True).first()
 
     def get_queryset(self):
-        queryset = Review.objects.filter(title__id=self.kwargs.get('title_id'))
+        queryset = Review.objects.filter(
+            title__id=self.kwargs.get('title_id')
+        ).select_related('author')
 
         return queryset
 
@@ -126,8 +249,16 @@ class CommentViewSet(ReviewCommentMixin):
         review = get_object_or_404(Review, pk=review_id, title__id=title_id)
         serializer.save(author=self.request.user, review=review)
 
+    def get_last_modified(self):
+        if self.action != 'list':
+            return None
+        return Review.objects.filter(
+            pk=self.kwargs.get('review_id'),
+            title__id=self.kwargs.get('title_id')
+        ).values_list('comments_modified', flat=True).first()
+
     def get_queryset(self):
         queryset = Comment.objects.filter(
             review__id=self.kwargs.get('review_id')
-        )
+        ).select_related('author')
         return queryset
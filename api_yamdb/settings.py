@@ -41,10 +41,11 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'django_filters',
-    'api',
+    'api.apps.ApiConfig',
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -52,6 +53,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
+    'api.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -75,6 +78,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+# Thread pools of api.asgi.CatalogASGIHandler: hot catalog reads / the rest.
+ASGI_CATALOG_THREADS = int(os.getenv('ASGI_CATALOG_THREADS', 16))
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 8))
+
 
 # Database
 # https://docs.djangoproject.com/en/3.0/ref/settings/#databases
@@ -90,6 +97,41 @@ DATABASES = {
     }
 }
 
+# Comma-separated replica hosts (database file names for SQLite), served
+# as the `replica_<n>` aliases. Reads of safe requests go there.
+DATABASE_REPLICA_ALIASES = []
+replicas = os.getenv('DB_REPLICAS', '').split(',')
+for index, replica in enumerate(filter(None, replicas)):
+    alias = f'replica_{index}'
+    replica_key = ('NAME' if DATABASES['default']['ENGINE'].endswith('sqlite3')
+                   else 'HOST')
+    DATABASES[alias] = dict(DATABASES['default'], **{
+        replica_key: replica.strip(), 'TEST': {'MIRROR': 'default'}
+    })
+    DATABASE_REPLICA_ALIASES.append(alias)
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+# Seconds a client keeps reading from the primary after a write. The pin
+# lives in the default cache, so with DB_REPLICAS set CACHE_BACKEND must be
+# one shared by all workers, not the per-process LocMemCache.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+API_LIST_CACHE_TIMEOUT = int(os.getenv('API_LIST_CACHE_TIMEOUT', 300))
+API_HTTP_CACHE_MAX_AGE = int(os.getenv('API_HTTP_CACHE_MAX_AGE', 0))
+
+# Reviews a title needs before its own mean outweighs the global mean.
+LEADERBOARD_PRIOR_COUNT = 10
+LEADERBOARD_MAX_LIMIT = 100
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
@@ -140,7 +182,18 @@ REST_FRAMEWORK = {
         ],
 
         'DEFAULT_AUTHENTICATION_CLASSES': [
-            'rest_framework_simplejwt.authentication.JWTAuthentication',
+            'api.authentication.StatelessJWTAuthentication',
+        ],
+
+        # orjson when installed, the stdlib json module otherwise
+        'DEFAULT_RENDERER_CLASSES': [
+            'api.renderers.FastJSONRenderer',
+            'rest_framework.renderers.BrowsableAPIRenderer',
+        ],
+        'DEFAULT_PARSER_CLASSES': [
+            'api.parsers.FastJSONParser',
+            'rest_framework.parsers.FormParser',
+            'rest_framework.parsers.MultiPartParser',
         ],
 
         'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
@@ -151,6 +204,58 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),
     }
 
+# Requests are authorized by the role claims of the token. With a cache,
+# users saved by a process override their tokens' claims in that process
+# (changes saved by other workers are not seen before the tokens expire),
+# and tokens without claims are resolved for JWT_USER_CACHE_TTL seconds.
+JWT_USER_CACHE_SIZE = int(os.getenv('JWT_USER_CACHE_SIZE', 10000))
+JWT_USER_CACHE_TTL = int(os.getenv('JWT_USER_CACHE_TTL', 60))
+
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 NOREPLY_YAMDB_EMAIL = 'noreply@yamdb.app'
+CONFIRMATION_CODE_LIFETIME = timedelta(hours=1)
+
+# Share of requests whose phase timings go to the `api.profiling` log;
+# `?profile=1` profiles a single request for staff regardless.
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_DEBUG_FIELD = os.getenv('PROFILING_DEBUG_FIELD', '') == '1'
+
+# Shared by all gunicorn workers of a host, so /api/v1/metrics/ sums them.
+METRICS_DIR = os.getenv('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1))
+
+# Statements slower than this are logged with their EXPLAIN plan, 0 is off.
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG',
+                           os.path.join(BASE_DIR, 'slow_queries.log'))
+# Also log each statement with its literal values (emails, code hashes),
+# which `advise_indexes --workload` replays; only enable it for such runs.
+SLOW_QUERY_STATEMENTS = os.getenv('SLOW_QUERY_STATEMENTS', '') == '1'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'profiling': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': os.getenv('PROFILING_LOG',
+                                  os.path.join(BASE_DIR, 'profiling.log')),
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+        },
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'api.profiling': {'handlers': ['profiling'], 'level': 'INFO'},
+        'api.slow_queries': {'handlers': ['slow_queries'],
+                             'level': 'WARNING'},
+    },
+}
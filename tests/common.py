@@ -1,4 +1,6 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -31,6 +33,26 @@ def auth_client(user):
     return client
 
 
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, \
+        f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+    return len(context.captured_queries)
+
+
+def assert_query_budget(client, url, add_rows):
+    """Checks that `url` costs the same number of queries before and after
+    `add_rows()` fills the page with more objects."""
+    before = count_queries(client, url)
+    add_rows()
+    after = count_queries(client, url)
+    assert before == after, \
+        f'Проверьте, что GET запрос `{url}` выполняет постоянное число SQL-запросов ' \
+        f'независимо от количества объектов на странице: было {before}, стало {after}'
+    return after
+
+
 def create_categories(user_client):
     data1 = {
         'name': 'Фильм',
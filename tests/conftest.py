@@ -1,4 +1,19 @@
+import pytest
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     # 'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    from api.authentication import user_cache
+
+    cache.clear()
+    user_cache.clear()
+    yield
+    cache.clear()
+    user_cache.clear()
@@ -242,3 +242,38 @@ class Test05ReviewAPI:
             f'Проверьте, что при DELETE запросе `/api/v1/titles/{{title_id}}/reviews/{{review_id}}/` ' \
             f'без токена авторизации возвращается статус 401'
         self.check_permissions(user, 'обычного пользователя', reviews, titles)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_review_unique_constraint(self, user_client, admin):
+        from django.db import IntegrityError
+        from api.models import Review, Title
+
+        titles, _, _ = create_titles(user_client)
+        title_id = titles[0]['id']
+        self.create_review(user_client, title_id, 'qwerty', 5)
+        with pytest.raises(IntegrityError):
+            Review.objects.create(
+                author=admin, title_id=title_id, text='qwerty', score=4
+            )
+        response = user_client.post(
+            f'/api/v1/titles/{title_id}/reviews/',
+            data={'text': 'qwerty123', 'score': 3}
+        )
+        assert response.status_code == 400, \
+            'Проверьте, что при повторном POST запросе `/api/v1/titles/{title_id}/reviews/` ' \
+            'от того же автора возвращается статус 400'
+        assert 'Вы уже оставили отзыв на данное произведение' in str(response.json()), \
+            'Проверьте, что при повторном отзыве на произведение возвращается сообщение об ошибке'
+        assert Review.objects.filter(title_id=title_id).count() == 1, \
+            'Проверьте, что повторный отзыв автора на произведение не сохраняется'
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count) == (5, 1), \
+            'Проверьте, что повторный отзыв не меняет рейтинг произведения'
+        missing = Title.objects.order_by('-id').first().id + 1
+        response = user_client.post(
+            f'/api/v1/titles/{missing}/reviews/',
+            data={'text': 'qwerty', 'score': 5}
+        )
+        assert response.status_code == 404, \
+            'Проверьте, что при POST запросе `/api/v1/titles/{title_id}/reviews/` ' \
+            'для несуществующего произведения возвращается статус 404'
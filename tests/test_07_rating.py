@@ -0,0 +1,123 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+
+from api.models import (LeaderboardPrior, Review, Title, TitleRanking,
+                        TitleScoreCount)
+
+from .common import auth_client, create_reviews
+
+
+class Test07RatingAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_follows_reviews(self, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (12, 3), \
+            'Проверьте, что при создании отзыва обновляются `rating_sum` и `rating_count` произведения'
+
+        user_client.patch(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/', data={'score': 8})
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (15, 3), \
+            'Проверьте, что при изменении оценки отзыва обновляется `rating_sum` произведения'
+
+        auth_client(moderator).delete(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/')
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (12, 2), \
+            'Проверьте, что при удалении отзыва обновляются `rating_sum` и `rating_count` произведения'
+        response = user_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json().get('rating') == 6, \
+            'Проверьте, что `rating` произведения считается по сохранённым агрегатам'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rebuild_ratings(self, user_client, admin):
+        _, titles, _, _ = create_reviews(user_client, admin)
+        Title.objects.update(rating_sum=0, rating_count=0)
+        call_command('rebuild_ratings', chunk_size=1, stdout=StringIO())
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (12, 3), \
+            'Проверьте, что команда `rebuild_ratings` пересчитывает агрегаты рейтинга'
+        title = Title.objects.get(pk=titles[1]['id'])
+        assert (title.rating_sum, title.rating_count) == (0, 0), \
+            'Проверьте, что команда `rebuild_ratings` обнуляет агрегаты произведений без отзывов'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_rating_distribution(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/rating-distribution/'
+        response = client.get(url)
+        assert response.status_code == 200, \
+            'Проверьте, что GET запрос `/api/v1/titles/{title_id}/rating-distribution/` возвращает статус 200'
+        counts = {row['score']: row['count'] for row in response.json()['distribution']}
+        assert counts == {**dict.fromkeys(range(1, 11), 0), 3: 1, 4: 1, 5: 1}, \
+            'Проверьте, что гистограмма оценок строится по отзывам произведения'
+
+        user_client.patch(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/', data={'score': 3})
+        auth_client(moderator).delete(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[2]["id"]}/')
+        data = client.get(url).json()
+        counts = {row['score']: row['count'] for row in data['distribution']}
+        assert data['count'] == 2 and counts[3] == 2 and counts[4] == 0 and counts[5] == 0, \
+            'Проверьте, что гистограмма оценок обновляется при изменении и удалении отзывов'
+
+        TitleScoreCount.objects.all().delete()
+        call_command('rebuild_rating_distribution', stdout=StringIO())
+        assert client.get(url).json() == data, \
+            'Проверьте, что команда `rebuild_rating_distribution` пересчитывает гистограммы'
+        empty = client.get(f'/api/v1/titles/{titles[1]["id"]}/rating-distribution/').json()
+        assert empty['count'] == 0 and len(empty['distribution']) == 10, \
+            'Проверьте, что для произведения без отзывов возвращается нулевая гистограмма'
+        assert client.get('/api/v1/titles/999/rating-distribution/').status_code == 404, \
+            'Проверьте, что для несуществующего произведения возвращается статус 404'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_leaderboards(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        call_command('rebuild_leaderboards', stdout=StringIO())
+        response = client.get('/api/v1/leaderboards/top-rated/')
+        assert response.status_code == 200, \
+            'Проверьте, что GET запрос `/api/v1/leaderboards/top-rated/` возвращает статус 200'
+        data = response.json()
+        assert [row['rank'] for row in data] == [1, 2], \
+            'Проверьте, что рейтинг содержит все произведения с их местами'
+        row = next(row for row in data if row['title']['id'] == titles[0]['id'])
+        assert row['review_count'] == 3 and row['title']['rating'] == 4 and row['weighted_score'] == 4, \
+            'Проверьте, что строка рейтинга содержит взвешенную оценку, число отзывов и данные произведения'
+
+        for i in range(3):
+            author = get_user_model().objects.create(username=f'fan{i}', email=f'fan{i}@yamdb.fake')
+            Review.objects.create(title_id=titles[1]['id'], author=author, text='!', score=10)
+        data = client.get('/api/v1/leaderboards/top-rated/').json()
+        assert data[0]['title']['id'] == titles[1]['id'], \
+            'Проверьте, что рейтинг обновляется при добавлении отзывов'
+        data = client.get('/api/v1/leaderboards/most-reviewed/?limit=1').json()
+        assert len(data) == 1 and data[0]['review_count'] == 3, \
+            'Проверьте, что параметр `limit` ограничивает число строк рейтинга'
+
+        data = client.get(f'/api/v1/leaderboards/top-rated/?genre={titles[1]["genre"][0]}').json()
+        assert [row['title']['id'] for row in data] == [titles[1]['id']], \
+            'Проверьте, что рейтинг можно получить для отдельного жанра'
+        data = client.get(f'/api/v1/leaderboards/top-rated/?category={titles[0]["category"]}').json()
+        assert [row['title']['id'] for row in data] == [titles[0]['id']], \
+            'Проверьте, что рейтинг можно получить для отдельной категории'
+        assert client.get('/api/v1/leaderboards/top-rated/?genre=unknown').status_code == 404, \
+            'Проверьте, что для несуществующего жанра возвращается статус 404'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_leaderboard_prior_is_stored(self, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        call_command('rebuild_leaderboards', stdout=StringIO())
+        prior = LeaderboardPrior.objects.get()
+        assert prior.mean == 4, \
+            'Проверьте, что `rebuild_leaderboards` сохраняет среднюю оценку рейтинга в базе данных'
+
+        LeaderboardPrior.objects.update(mean=1.0)
+        cache.clear()
+        author = get_user_model().objects.create(username='prior', email='prior@yamdb.fake')
+        Review.objects.create(title_id=titles[1]['id'], author=author, text='!', score=10)
+        ranking = TitleRanking.objects.filter(title_id=titles[1]['id']).first()
+        assert ranking.weighted_score == (10 + 10 * 1.0) / (1 + 10), \
+            'Проверьте, что все процессы взвешивают оценки сохранённой в базе средней, а не пересчитывают её'
@@ -0,0 +1,132 @@
+import pytest
+from django.contrib.auth import get_user_model
+
+from api.cache import bump_version
+from api.models import Category, Comment, Genre, Review, Title
+
+from .common import assert_query_budget, count_queries, create_comments
+
+ROWS = 15
+
+
+def create_users(count):
+    prefix = f'budget{get_user_model().objects.count()}_'
+    get_user_model().objects.bulk_create([
+        get_user_model()(username=f'{prefix}{i}', email=f'{prefix}{i}@yamdb.fake')
+        for i in range(count)
+    ])
+    return get_user_model().objects.filter(username__startswith=prefix)
+
+
+class Test08QueryBudget:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles(self, client, user_client, admin):
+        create_comments(user_client, admin)
+        category = Category.objects.first()
+        genres = list(Genre.objects.all())
+
+        def add_titles():
+            for i in range(ROWS):
+                title = Title.objects.create(name=f'Title {i}', year=2000, category=category)
+                title.genre.set(genres)
+
+        assert_query_budget(client, '/api/v1/titles/', add_titles)
+        assert_query_budget(user_client, '/api/v1/titles/', lambda: None)
+        title = Title.objects.first()
+        assert_query_budget(client, f'/api/v1/titles/{title.id}/', lambda: title.genre.set(genres))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_genres_categories(self, client, user_client, admin):
+        create_comments(user_client, admin)
+
+        def add_genres():
+            Genre.objects.bulk_create([Genre(name=f'g{i}', slug=f'g{i}') for i in range(ROWS)])
+            bump_version(Genre)
+
+        def add_categories():
+            Category.objects.bulk_create([Category(name=f'c{i}', slug=f'c{i}') for i in range(ROWS)])
+            bump_version(Category)
+
+        assert_query_budget(client, '/api/v1/genres/', add_genres)
+        assert_query_budget(client, '/api/v1/categories/', add_categories)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cached_lookups(self, client, user_client):
+        for url in ('/api/v1/genres/', '/api/v1/categories/'):
+            count_queries(client, url)
+            assert count_queries(client, url) == 0, \
+                f'Проверьте, что повторный GET запрос `{url}` обслуживается из кэша без SQL-запросов'
+        user_client.post('/api/v1/genres/', data={'name': 'Ужасы', 'slug': 'horror'})
+        response = client.get('/api/v1/genres/?search=Ужасы')
+        assert response.json()['count'] == 1, \
+            'Проверьте, что кэш списка жанров сбрасывается при создании жанра'
+        user_client.delete('/api/v1/genres/horror/')
+        response = client.get('/api/v1/genres/?search=Ужасы')
+        assert response.json()['count'] == 0, \
+            'Проверьте, что кэш списка жанров сбрасывается при удалении жанра'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_reviews_comments(self, client, user_client, admin):
+        comments, reviews, titles, _, _ = create_comments(user_client, admin)
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+
+        def add_reviews():
+            Review.objects.bulk_create([
+                Review(title_id=title_id, author=author, text='text', score=5)
+                for author in create_users(ROWS)
+            ])
+
+        def add_comments():
+            Comment.objects.bulk_create([
+                Comment(review_id=review_id, author=author, text='text')
+                for author in create_users(ROWS)
+            ])
+
+        assert_query_budget(client, f'/api/v1/titles/{title_id}/reviews/', add_reviews)
+        assert_query_budget(client, f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/', add_comments)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_users(self, user_client, admin):
+        user_client.get('/api/v1/users/me/')
+        assert_query_budget(user_client, '/api/v1/users/', lambda: create_users(ROWS))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_version_bumped_on_commit(self):
+        from django.db import transaction
+
+        from api.cache import get_version
+
+        version = get_version(Genre)
+        with transaction.atomic():
+            Genre.objects.create(name='Ужасы', slug='horror')
+            assert get_version(Genre) == version, \
+                'Проверьте, что версия кэша жанров меняется только после фиксации транзакции'
+        assert get_version(Genre) != version, \
+            'Проверьте, что версия кэша жанров меняется после фиксации транзакции'
+        version = get_version(Genre)
+        with pytest.raises(ValueError), transaction.atomic():
+            Genre.objects.create(name='Драма', slug='drama')
+            raise ValueError
+        assert get_version(Genre) == version, \
+            'Проверьте, что откат транзакции не сбрасывает кэш жанров'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_cached_links_follow_host(self, client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        Genre.objects.bulk_create([
+            Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(ROWS)
+        ])
+        first = client.get('/api/v1/genres/', HTTP_HOST='one.example').json()
+        assert first['next'] == 'http://one.example/api/v1/genres/?page=2', \
+            'Проверьте, что ссылки пагинации строятся от адреса запроса'
+        with CaptureQueriesContext(connection) as context:
+            second = client.get('/api/v1/genres/', HTTP_HOST='two.example').json()
+        assert not context.captured_queries, \
+            'Проверьте, что повторный GET запрос `/api/v1/genres/` обслуживается из кэша'
+        assert second['next'] == 'http://two.example/api/v1/genres/?page=2', \
+            'Проверьте, что закэшированный список не отдает ссылки пагинации другого хоста'
+        assert second['results'] == first['results'], \
+            'Проверьте, что закэшированный список совпадает с исходным'
@@ -0,0 +1,85 @@
+import pytest
+from django.contrib.auth import get_user_model
+
+from api.models import Review
+
+from .common import create_titles
+
+
+class Test09CursorPagination:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_cursor(self, client, user_client):
+        titles, _, _ = create_titles(user_client)
+        title_id = titles[0]['id']
+        for i in range(25):
+            author = get_user_model().objects.create(username=f'cursor{i}', email=f'cursor{i}@yamdb.fake')
+            Review.objects.create(title_id=title_id, author=author, text=f'review {i}', score=5)
+
+        url = f'/api/v1/titles/{title_id}/reviews/?pagination=cursor'
+        seen = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200, \
+                'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/reviews/?pagination=cursor` ' \
+                'возвращается статус 200'
+            data = response.json()
+            assert 'count' not in data and 'next' in data and 'results' in data, \
+                'Проверьте, что при `pagination=cursor` возвращается курсорная пагинация без `count`'
+            seen.extend(review['text'] for review in data['results'])
+            url = data['next']
+        assert seen == [f'review {i}' for i in reversed(range(25))], \
+            'Проверьте, что курсорная пагинация отзывов возвращает все отзывы от новых к старым без повторов'
+
+        data = client.get(f'/api/v1/titles/{title_id}/reviews/').json()
+        assert data['count'] == 25, \
+            'Проверьте, что без параметра `pagination` сохраняется пагинация по номеру страницы'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_titles_cursor(self, client, user_client):
+        titles, _, _ = create_titles(user_client)
+        data = client.get('/api/v1/titles/?pagination=cursor').json()
+        assert [title['id'] for title in data['results']] == sorted(
+            (title['id'] for title in titles), reverse=True), \
+            'Проверьте, что при GET запросе `/api/v1/titles/?pagination=cursor` произведения упорядочены по `id`'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_equal_pub_dates(self, client, user_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.utils import timezone
+
+        titles, _, _ = create_titles(user_client)
+        title_id = titles[0]['id']
+        for i in range(25):
+            author = get_user_model().objects.create(username=f'keyset{i}', email=f'keyset{i}@yamdb.fake')
+            Review.objects.create(title_id=title_id, author=author, text=f'review {i}', score=5)
+        Review.objects.filter(text__in=[f'review {i}' for i in range(3, 22)]).update(pub_date=timezone.now())
+        expected = list(Review.objects.filter(title_id=title_id).order_by(
+            '-pub_date', '-id').values_list('text', flat=True))
+
+        url = f'/api/v1/titles/{title_id}/reviews/?pagination=cursor'
+        pages = []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                data = client.get(url).json()
+            assert not any('OFFSET' in query['sql'] for query in context.captured_queries), \
+                'Проверьте, что курсорная пагинация не использует OFFSET для отзывов с одинаковой датой'
+            pages.append([review['text'] for review in data['results']])
+            last, url = url, data['next']
+        assert sum(pages, []) == expected, \
+            'Проверьте, что курсорная пагинация не пропускает и не повторяет отзывы с одинаковой датой'
+
+        previous = client.get(last).json()['previous']
+        back = []
+        while previous:
+            data = client.get(previous).json()
+            back.insert(0, [review['text'] for review in data['results']])
+            previous = data['previous']
+        assert back == pages[:-1], \
+            'Проверьте, что ссылка `previous` курсорной пагинации возвращает предыдущие страницы'
+
+        for cursor in ('cD1iYWQ%3D', 'cD0lNUIlMjJ4JTIyJTJDKyUyMjElMjIlNUQ%3D'):
+            response = client.get(f'/api/v1/titles/{title_id}/reviews/?pagination=cursor&cursor={cursor}')
+            assert response.status_code == 404, \
+                'Проверьте, что неверный курсор дает ответ 404'
@@ -0,0 +1,80 @@
+import pytest
+
+from api.models import Category, Title
+from api.search import SQLiteFTSSearchBackend, get_search_backend
+
+
+class Test10TitleSearch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_search_by_name(self, client):
+        category = Category.objects.create(name='Фильм', slug='films')
+        for name in ['Крестный отец', 'Крестный отец 2', 'Отец невесты', 'Побег из Шоушенка']:
+            Title.objects.create(name=name, year=1972, category=category)
+        assert isinstance(get_search_backend(), SQLiteFTSSearchBackend), \
+            'Проверьте, что на SQLite для поиска произведений используется FTS5'
+
+        response = client.get('/api/v1/titles/?name=отец')
+        names = sorted(title['name'] for title in response.json()['results'])
+        assert names == ['Крестный отец', 'Крестный отец 2', 'Отец невесты'], \
+            'Проверьте, что фильтр `name` находит произведения по подстроке названия'
+
+        title = Title.objects.get(name='Побег из Шоушенка')
+        title.name = 'Зеленая миля'
+        title.save()
+        assert client.get('/api/v1/titles/?name=Шоушен').json()['count'] == 0, \
+            'Проверьте, что поисковый индекс обновляется при изменении произведения'
+        assert client.get('/api/v1/titles/?name=миля').json()['count'] == 1, \
+            'Проверьте, что поисковый индекс обновляется при изменении произведения'
+        title.delete()
+        assert client.get('/api/v1/titles/?name=миля').json()['count'] == 0, \
+            'Проверьте, что произведение удаляется из поискового индекса'
+        assert client.get('/api/v1/titles/?name=ец').json()['count'] == 3, \
+            'Проверьте, что короткие запросы по-прежнему ищут по подстроке'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_old_sqlite_falls_back_to_like(self, client, monkeypatch):
+        from importlib import import_module
+
+        from django.db import connection
+
+        from api import search
+
+        migration = import_module('api.migrations.0004_title_search')
+        monkeypatch.setattr(migration, 'TRIGRAM_SQLITE_VERSION', (99, 0, 0))
+        monkeypatch.setattr(SQLiteFTSSearchBackend, 'min_sqlite_version', (99, 0, 0))
+        monkeypatch.setattr(search, '_backends', {})
+        try:
+            with connection.schema_editor() as schema_editor:
+                migration.drop_search_index(None, schema_editor)
+                migration.create_search_index(None, schema_editor)
+            assert SQLiteFTSSearchBackend.table not in connection.introspection.table_names(), \
+                'Проверьте, что без tokenizer trigram (SQLite < 3.34) таблица FTS5 не создается'
+            assert type(get_search_backend()) is search.ContainsSearchBackend, \
+                'Проверьте, что без tokenizer trigram поиск произведений выполняется через LIKE'
+            category = Category.objects.create(name='Фильм', slug='films')
+            for name in ['Крестный отец', 'Побег из Шоушенка']:
+                Title.objects.create(name=name, year=1972, category=category)
+            assert client.get('/api/v1/titles/?name=отец').json()['count'] == 1, \
+                'Проверьте, что фильтр `name` находит произведения по подстроке названия'
+        finally:
+            monkeypatch.undo()
+            with connection.schema_editor() as schema_editor:
+                migration.drop_search_index(None, schema_editor)
+                migration.create_search_index(None, schema_editor)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_backend_follows_database(self, settings):
+        from django.db import connection
+
+        backend = get_search_backend()
+        name = connection.settings_dict['NAME']
+        try:
+            connection.settings_dict['NAME'] = f'{name}-other'
+            assert get_search_backend() is not backend, \
+                'Проверьте, что выбор поискового бэкенда не переживает смену базы данных'
+        finally:
+            connection.settings_dict['NAME'] = name
+        settings.TITLE_SEARCH_BACKEND = 'api.search.ContainsSearchBackend'
+        assert type(get_search_backend()).__name__ == 'ContainsSearchBackend', \
+            'Проверьте, что настройка TITLE_SEARCH_BACKEND учитывается'
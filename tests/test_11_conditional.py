@@ -0,0 +1,56 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments
+
+
+class Test11ConditionalGet:
+
+    def check_not_modified(self, client, user_client, url, change):
+        response = client.get(url)
+        etag = response.get('ETag')
+        assert etag and response.get('Last-Modified'), \
+            f'Проверьте, что GET запрос `{url}` возвращает заголовки `ETag` и `Last-Modified`'
+        assert 'public' in response.get('Cache-Control', ''), \
+            f'Проверьте, что анонимный GET запрос `{url}` можно кэшировать (`Cache-Control: public`)'
+        assert 'Authorization' in response.get('Vary', ''), \
+            f'Проверьте, что ответ на GET запрос `{url}` содержит `Vary: Authorization`'
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, \
+            f'Проверьте, что GET запрос `{url}` с актуальным `If-None-Match` возвращает статус 304'
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=client.get(url)['Last-Modified'])
+        assert response.status_code == 304, \
+            f'Проверьте, что GET запрос `{url}` с актуальным `If-Modified-Since` возвращает статус 304'
+
+        change()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag, \
+            f'Проверьте, что после изменения данных GET запрос `{url}` возвращает статус 200 и новый `ETag`'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_reviews_comments(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        reviews_url = f'{title_url}reviews/'
+        review_url = f'{reviews_url}{reviews[0]["id"]}/'
+        comments_url = f'{review_url}comments/'
+
+        self.check_not_modified(client, user_client, title_url,
+                                lambda: user_client.patch(review_url, data={'score': 9}))
+        self.check_not_modified(client, user_client, reviews_url,
+                                lambda: user_client.patch(review_url, data={'text': 'new text'}))
+        self.check_not_modified(
+            client, user_client, comments_url,
+            lambda: user_client.patch(f'{comments_url}{comments[0]["id"]}/', data={'text': 'new text'})
+        )
+
+        etag = client.get(title_url)['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(title_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304 and len(context.captured_queries) == 1, \
+            'Проверьте, что ответ 304 формируется одним SQL-запросом, без сериализации произведения'
+        response = user_client.get(title_url)
+        assert 'private' in response.get('Cache-Control', ''), \
+            'Проверьте, что ответы авторизованным пользователям помечены `Cache-Control: private`'
@@ -0,0 +1,55 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.models import Comment, Review, Title, User
+
+
+class Test12ImportCSV:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_import_dataset(self, client):
+        out = StringIO()
+        call_command('import_csv', batch_size=7, stdout=out)
+        assert Title.objects.count() == 32 and Review.objects.count() == 73 and Comment.objects.count() == 5, \
+            'Проверьте, что команда `import_csv` загружает все строки из data/*.csv'
+        assert 'rows/s' in out.getvalue(), \
+            'Проверьте, что команда `import_csv` сообщает скорость импорта'
+
+        review = Review.objects.get(pk=1)
+        assert (review.title_id, review.author_id, review.score) == (1, 100, 10), \
+            'Проверьте, что команда `import_csv` сохраняет первичные и внешние ключи'
+        assert review.pub_date.year == 2019, \
+            'Проверьте, что команда `import_csv` сохраняет `pub_date` из файла'
+
+        title = Title.objects.get(pk=1)
+        assert title.rating_count == Review.objects.filter(title=title).count(), \
+            'Проверьте, что после импорта пересчитываются агрегаты рейтинга'
+        response = client.get('/api/v1/titles/1/')
+        assert response.status_code == 200 and response.json()['genre'], \
+            'Проверьте, что импортированные произведения доступны через API вместе с жанрами'
+
+    def generate(self, seed):
+        call_command('generate_dataset', scale=3, seed=seed, batch_size=50,
+                     stdout=StringIO())
+        return list(Review.objects.order_by('pk').values_list(
+            'title__name', 'author__username', 'score', 'pub_date'
+        ))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_generate_dataset(self, client):
+        reviews = self.generate(seed=1)
+        assert Title.objects.count() == 3 * 32 and reviews and Comment.objects.exists(), \
+            'Проверьте, что команда `generate_dataset --scale N` создаёт в N раз больше произведений'
+        title = Title.objects.filter(rating_count__gt=0).first()
+        assert title.rating_count == title.reviews.count(), \
+            'Проверьте, что после `generate_dataset` агрегаты рейтинга совпадают с отзывами'
+        response = client.get('/api/v1/leaderboards/top-rated/')
+        assert response.status_code == 200 and response.json(), \
+            'Проверьте, что после `generate_dataset` перестраиваются лидерборды'
+
+        Title.objects.all().delete()
+        User.objects.filter(username__startswith='synthetic').delete()
+        assert self.generate(seed=1) == reviews, \
+            'Проверьте, что команда `generate_dataset` детерминирована при одинаковом `--seed`'
@@ -0,0 +1,44 @@
+import csv
+import json
+
+import pytest
+
+from .common import auth_client, create_comments
+
+
+class Test13Export:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_export_ndjson(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        for name, count in (('titles', len(titles)), ('reviews', len(reviews)), ('comments', len(comments))):
+            url = f'/api/v1/export/{name}/'
+            response = user_client.get(url)
+            assert response.status_code == 200 and response.streaming, \
+                f'Проверьте, что GET запрос `{url}` от администратора возвращает потоковый ответ'
+            rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+            assert len(rows) == count, \
+                f'Проверьте, что GET запрос `{url}` выгружает все объекты в формате NDJSON'
+            assert client.get(url).status_code == 401 and auth_client(user).get(url).status_code == 403, \
+                f'Проверьте, что GET запрос `{url}` доступен только администратору'
+
+        response = user_client.get('/api/v1/titles/')
+        title = next(row for row in response.json()['results'] if row['id'] == titles[0]['id'])
+        export = b''.join(user_client.get('/api/v1/export/titles/').streaming_content).decode()
+        exported = next(row for row in map(json.loads, export.splitlines()) if row['id'] == titles[0]['id'])
+        assert exported == title, \
+            'Проверьте, что выгрузка произведений совпадает по формату с `/api/v1/titles/`'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_export_csv(self, user_client, admin):
+        _, reviews, _, _, _ = create_comments(user_client, admin)
+        response = user_client.get('/api/v1/export/reviews/?output=csv')
+        assert response['Content-Type'] == 'text/csv', \
+            'Проверьте, что при `output=csv` выгрузка возвращается в формате CSV'
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        assert sorted(int(row['id']) for row in rows) == sorted(review['id'] for review in reviews), \
+            'Проверьте, что CSV выгрузка отзывов содержит все отзывы'
+        assert set(rows[0]) == {'id', 'text', 'author', 'score', 'pub_date', 'title'}, \
+            'Проверьте, что CSV выгрузка отзывов содержит поля `ReviewSerializer` и `title`'
+        assert user_client.get('/api/v1/export/reviews/?output=xml').status_code == 400, \
+            'Проверьте, что неизвестный формат выгрузки возвращает статус 400'
@@ -0,0 +1,151 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import ConfirmationCode, OutboxEmail
+
+
+class Test14Auth:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_confirmation_code_outbox(self, client, admin):
+        response = client.post('/api/v1/auth/email/', data={'email': admin.email})
+        assert response.status_code == 200 and response.json() == {'email': admin.email}, \
+            'Проверьте, что POST запрос `/api/v1/auth/email/` возвращает адрес почты'
+        assert len(mail.outbox) == 0 and OutboxEmail.objects.filter(to_email=admin.email).count() == 1, \
+            'Проверьте, что письмо с кодом подтверждения ставится в очередь, а не отправляется в запросе'
+
+        client.post('/api/v1/auth/email/', data={'email': admin.email})
+        assert OutboxEmail.objects.filter(to_email=admin.email).count() == 1, \
+            'Проверьте, что повторный запрос кода не создаёт второе письмо в очереди'
+
+        call_command('send_outbox', once=True, workers=1, stdout=StringIO())
+        assert len(mail.outbox) == 1 and mail.outbox[0].to == [admin.email], \
+            'Проверьте, что команда `send_outbox` отправляет письма из очереди'
+        assert OutboxEmail.objects.get(to_email=admin.email).sent_at is not None, \
+            'Проверьте, что отправленное письмо помечается как отправленное'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_outbox_retry(self, admin, settings):
+        from api.utils import generate_mail
+
+        settings.EMAIL_BACKEND = 'tests.test_14_auth.FailingBackend'
+        generate_mail(admin.email, 'code')
+        call_command('send_outbox', once=True, workers=1, retry_delay=60, stdout=StringIO())
+        message = OutboxEmail.objects.get(to_email=admin.email)
+        assert message.sent_at is None and message.attempts == 1 and message.last_error, \
+            'Проверьте, что при ошибке отправки письмо остаётся в очереди для повторной попытки'
+        assert message.next_attempt_at > message.queued_at, \
+            'Проверьте, что повторная попытка отправки откладывается'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_stateless_token(self, admin, settings):
+        from api.authentication import user_cache
+        from api.serializers import get_tokens_for_user
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(admin)["access"]}')
+        url = '/api/v1/titles/'
+        data = {'name': 'Поворот туда', 'year': 2000, 'genre': [], 'category': 'none'}
+
+        user_cache.maxsize = 0
+        try:
+            with CaptureQueriesContext(connection) as context:
+                response = client.post(url, data=data)
+        finally:
+            user_cache.maxsize = settings.JWT_USER_CACHE_SIZE
+        assert response.status_code == 400, \
+            'Проверьте, что токен с ролью в claims проходит проверку прав администратора'
+        assert not any('api_user' in query['sql'] for query in context.captured_queries), \
+            'Проверьте, что при токене с claims пользователь не загружается из базы данных'
+
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        assert not any('api_user' in query['sql'] for query in context.captured_queries), \
+            'Проверьте, что при включённом кэше токен с claims не требует запроса пользователя'
+
+        admin.is_active = False
+        admin.save()
+        assert client.get(url).status_code == 401, \
+            'Проверьте, что кэш пользователя сбрасывается при изменении пользователя'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_confirmation_code_token(self, client, admin):
+        client.post('/api/v1/auth/email/', data={'email': admin.email})
+        code = OutboxEmail.objects.get(to_email=admin.email).body.split()[-1]
+        assert not ConfirmationCode.objects.filter(code_hash=code).exists(), \
+            'Проверьте, что код подтверждения хранится в виде хэша'
+
+        data = {'email': admin.email, 'confirmation_code': code}
+        response = client.post('/api/v1/auth/token/', data=data)
+        assert response.status_code == 200 and 'access' in response.json(), \
+            'Проверьте, что POST запрос `/api/v1/auth/token/` с верным кодом возвращает токен'
+        response = client.post('/api/v1/auth/token/', data=data)
+        assert response.status_code == 404, \
+            'Проверьте, что код подтверждения можно использовать только один раз'
+
+        client.post('/api/v1/auth/email/', data={'email': admin.email})
+        code = OutboxEmail.objects.get(to_email=admin.email, sent_at=None).body.split()[-1]
+        response = client.post('/api/v1/auth/token/', data={'email': 'other@yamdb.fake', 'confirmation_code': code})
+        assert response.status_code == 404, \
+            'Проверьте, что код подтверждения действует только для своего адреса почты'
+        ConfirmationCode.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+        response = client.post('/api/v1/auth/token/', data={'email': admin.email, 'confirmation_code': code})
+        assert response.status_code == 404, \
+            'Проверьте, что просроченный код подтверждения не принимается'
+        call_command('purge_confirmation_codes', batch_size=1, stdout=StringIO())
+        assert not ConfirmationCode.objects.exists(), \
+            'Проверьте, что команда `purge_confirmation_codes` удаляет просроченные коды'
+
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_queue_mail_sent_meanwhile(self, monkeypatch):
+        from api.utils import queue_mail
+
+        queue_mail('race@yamdb.fake', 'Код', 'old')
+        pending = OutboxEmail.objects.filter
+
+        def filter_after_sending(*args, **kwargs):
+            # `send_outbox` delivers the pending message right after the
+            # failed insert
+            monkeypatch.setattr(OutboxEmail.objects, 'filter', pending)
+            pending(sent_at=None).update(sent_at=timezone.now())
+            return pending(*args, **kwargs)
+
+        monkeypatch.setattr(OutboxEmail.objects, 'filter', filter_after_sending)
+        queue_mail('race@yamdb.fake', 'Код', 'new')
+        assert OutboxEmail.objects.filter(to_email='race@yamdb.fake', sent_at=None, body='new').exists(), \
+            'Проверьте, что письмо ставится в очередь, даже если ожидавшее письмо отправлено во время замены'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_stateless_token_role_change(self, admin):
+        from api.serializers import get_tokens_for_user
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(admin)["access"]}')
+        url = '/api/v1/titles/'
+        data = {'name': 'Поворот туда', 'year': 2000, 'genre': [], 'category': 'none'}
+
+        admin.role = 'user'
+        admin.is_staff = False
+        admin.save()
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url, data=data)
+        assert response.status_code == 403, \
+            'Проверьте, что сохранённая смена роли имеет приоритет над claims токена'
+        assert not any('api_user' in query['sql'] for query in context.captured_queries), \
+            'Проверьте, что после смены роли пользователь берётся из кэша'
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP is down')
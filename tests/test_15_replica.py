@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+
+SCRIPT = '''
+import json
+from rest_framework.test import APIClient
+from api.models import Category, Title, User
+from api.serializers import get_tokens_for_user
+
+category = Category.objects.get(slug='films')
+# written to the primary only: the replica "lags" behind it
+Title.objects.create(name='Только на основном сервере', year=2000, category=category)
+
+admin = User.objects.get(username='admin')
+admin_client = APIClient()
+admin_client.credentials(HTTP_AUTHORIZATION='Bearer ' + get_tokens_for_user(admin)['access'])
+anonymous_client = APIClient()
+
+result = {'anonymous_before': anonymous_client.get('/api/v1/titles/').json()['count']}
+response = admin_client.post('/api/v1/titles/', data={
+    'name': 'Новое произведение', 'year': 2020, 'genre': [], 'category': 'films'})
+result['created'] = response.status_code
+result['admin_after'] = admin_client.get('/api/v1/titles/').json()['count']
+result['anonymous_after'] = anonymous_client.get('/api/v1/titles/').json()['count']
+print(json.dumps(result))
+'''
+
+SEED = '''
+from api.models import Category, Title, User
+User.objects.create_superuser('admin', 'admin@yamdb.fake', 'admin', role='admin')
+category = Category.objects.create(name='Фильм', slug='films')
+Title.objects.create(name='Реплицированное произведение', year=1990, category=category)
+'''
+
+
+class Test15ReplicaRouting:
+
+    def run(self, env, *args):
+        return subprocess.run(
+            [sys.executable, 'manage.py', *args], cwd=settings.BASE_DIR, env=env,
+            check=True, capture_output=True, text=True
+        ).stdout
+
+    def test_01_reads_go_to_replica_until_client_writes(self, tmp_path):
+        primary, replica = tmp_path / 'primary.sqlite3', tmp_path / 'replica.sqlite3'
+        env = dict(os.environ, SECRET_KEY='replica-test', DB_DATABASE=str(primary),
+                   SQL_ENGINE='django.db.backends.sqlite3')
+        self.run(env, 'migrate', '-v', '0')
+        self.run(env, 'shell', '-c', SEED)
+        shutil.copy(primary, replica)
+
+        env['DB_REPLICAS'] = str(replica)
+        result = json.loads(self.run(env, 'shell', '-c', SCRIPT).splitlines()[-1])
+        assert result['anonymous_before'] == 1, \
+            'Проверьте, что GET запросы читают данные с реплики'
+        assert result['created'] == 201, \
+            'Проверьте, что POST запросы выполняются на основном сервере'
+        assert result['admin_after'] == 3, \
+            'Проверьте, что после записи клиент читает данные с основного сервера'
+        assert result['anonymous_after'] == 1, \
+            'Проверьте, что остальные клиенты продолжают читать данные с реплики'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_replica_lists_are_not_cached(self, client):
+        from api.routers import use_replica
+
+        from .common import count_queries
+
+        token = use_replica.set(True)
+        try:
+            count_queries(client, '/api/v1/genres/')
+            assert count_queries(client, '/api/v1/genres/') > 0, \
+                'Проверьте, что списки, прочитанные с реплики, не записываются в кэш'
+        finally:
+            use_replica.reset(token)
+        count_queries(client, '/api/v1/genres/')
+        assert count_queries(client, '/api/v1/genres/') == 0, \
+            'Проверьте, что списки, прочитанные с основного сервера, кэшируются'
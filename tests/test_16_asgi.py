@@ -0,0 +1,73 @@
+import json
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.asgi import CatalogASGIHandler
+from api.models import Category, Genre, Title
+
+
+class Test16ASGI:
+
+    def request(self, handler, method, path, headers=()):
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            'type': 'http', 'method': method, 'path': path, 'query_string': b'',
+            'headers': [(b'host', b'testserver'), *headers],
+        }
+        async_to_sync(handler)(scope, receive, send)
+        body = b''.join(message.get('body', b'') for message in sent)
+        return sent[0]['status'], body
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_catalog_reads_use_catalog_pool(self, monkeypatch):
+        Genre.objects.create(name='Драма', slug='drama')
+        handler = CatalogASGIHandler()
+        threads = []
+        get_response = CatalogASGIHandler.get_response_in_thread
+
+        def spy(self, request):
+            threads.append(threading.current_thread().name)
+            return get_response(self, request)
+
+        monkeypatch.setattr(CatalogASGIHandler, 'get_response_in_thread', spy)
+
+        status, body = self.request(handler, 'GET', '/api/v1/genres/')
+        assert status == 200, \
+            'Проверьте, что GET запрос `/api/v1/genres/` через ASGI возвращает статус 200'
+        assert json.loads(body)['results'][0]['slug'] == 'drama', \
+            'Проверьте, что GET запрос `/api/v1/genres/` через ASGI возвращает жанры'
+        assert threads[-1].startswith('catalog'), \
+            'Проверьте, что чтение каталога выполняется в отдельном пуле потоков'
+
+        status, _ = self.request(handler, 'POST', '/api/v1/genres/')
+        assert status == 401, \
+            'Проверьте, что POST запрос `/api/v1/genres/` через ASGI требует авторизации'
+        assert threads[-1].startswith('asgi'), \
+            'Проверьте, что запросы на запись не занимают пул потоков каталога'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_streaming_export(self, admin):
+        category = Category.objects.create(name='Фильм', slug='films')
+        Title.objects.bulk_create([
+            Title(name=f'Title {i}', year=2000, category=category) for i in range(5)
+        ])
+        token = RefreshToken.for_user(admin).access_token
+        status, body = self.request(
+            CatalogASGIHandler(), 'GET', '/api/v1/export/titles/',
+            headers=[(b'authorization', f'Bearer {token}'.encode())]
+        )
+        assert status == 200, \
+            'Проверьте, что потоковая выгрузка `/api/v1/export/titles/` через ASGI возвращает статус 200'
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        assert [row['name'] for row in rows] == [f'Title {i}' for i in range(5)], \
+            'Проверьте, что потоковая выгрузка через ASGI отдаёт все строки таблицы'
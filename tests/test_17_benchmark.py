@@ -0,0 +1,51 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.benchmarks import baseline_scales, compare, run_benchmarks
+from api.models import User
+
+
+class Test17Benchmark:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_benchmark_all_routes(self):
+        call_command('generate_dataset', scale=1, stdout=StringIO())
+        admin = User.objects.create_superuser(
+            'benchmark', 'benchmark@yamdb.fake', role=User.Role.ADMIN
+        )
+        results = run_benchmarks(admin, requests=3, warmup=1)
+        expected = {
+            'genres-list', 'categories-list', 'titles-list', 'titles-detail',
+            'titles-rating-distribution', 'user-list', 'user-detail', 'user-me',
+            'reviews-list', 'reviews-detail', 'comments-list', 'comments-detail',
+            'auth-email', 'auth-token', 'auth-token-refresh',
+            'export-titles', 'export-reviews', 'export-comments',
+            'leaderboard-top-rated', 'leaderboard-most-reviewed',
+            'titles-partial-update', 'genres-create', 'comments-create',
+        }
+        assert set(results) == expected, \
+            'Проверьте, что бенчмарк покрывает все GET маршруты `v1_router`, выгрузки, рейтинги, ' \
+            'маршруты `v1/auth/` и запись'
+        assert results['export-titles']['bytes'] and results['export-titles']['queries'], \
+            'Проверьте, что у потоковых выгрузок измеряется тело ответа целиком'
+        stats = results['titles-list']
+        assert stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms'] and stats['queries'] and stats['bytes'], \
+            'Проверьте, что бенчмарк записывает перцентили задержки, число запросов и размер ответа'
+
+        baseline = {'1': results}
+        assert compare({'1': results}, baseline, tolerance=0.5) == [], \
+            'Проверьте, что результаты, совпадающие с эталоном, не считаются регрессией'
+        slower = {'1': {'titles-list': dict(stats, queries=stats['queries'] + 1)}}
+        assert compare(slower, baseline, tolerance=0.5), \
+            'Проверьте, что рост числа SQL-запросов считается регрессией'
+
+        stored = baseline_scales(baseline)
+        assert set(stored['1']['titles-list']) == {'queries', 'bytes'}, \
+            'Проверьте, что эталон бенчмарка не хранит задержки, зависящие от машины'
+        slower = {'1': {'titles-list': dict(stats, p50_ms=stats['p50_ms'] * 10 + 100)}}
+        assert compare(slower, stored, tolerance=0.5) == [], \
+            'Проверьте, что без задержек в эталоне задержки не сравниваются'
+        assert compare(slower, baseline, tolerance=0.5), \
+            'Проверьте, что задержки сравниваются с эталоном, который их содержит'
@@ -0,0 +1,103 @@
+import json
+import logging
+
+import pytest
+
+from .common import create_titles
+
+
+class Test18Profiling:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_server_timing(self, client, user_client, settings):
+        settings.DEBUG = False
+        create_titles(user_client)
+
+        response = user_client.get('/api/v1/titles/?profile=1')
+        timing = response.get('Server-Timing', '')
+        for metric in ('db;dur=', 'queries', 'auth;dur=', 'serialize;dur=', 'render;dur=', 'total;dur='):
+            assert metric in timing, \
+                f'Проверьте, что заголовок `Server-Timing` содержит `{metric}`'
+        assert '_profile' not in response.json(), \
+            'Проверьте, что поле `_profile` добавляется только при включённом `PROFILING_DEBUG_FIELD`'
+
+        assert 'Server-Timing' not in client.get('/api/v1/titles/?profile=1'), \
+            'Проверьте, что анонимные пользователи не видят `Server-Timing`'
+        assert 'Server-Timing' not in user_client.get('/api/v1/titles/'), \
+            'Проверьте, что без `?profile=1` запрос не профилируется'
+
+        settings.PROFILING_DEBUG_FIELD = True
+        profile = user_client.get('/api/v1/titles/?profile=1').json()['_profile']
+        assert profile['queries'] > 0 and profile['ms']['total'] >= profile['ms']['serialize'], \
+            'Проверьте, что поле `_profile` содержит число запросов и время фаз'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_sampled_log(self, client, settings, monkeypatch, caplog):
+        logger = logging.getLogger('api.profiling')
+        monkeypatch.setattr(logger, 'handlers', [])
+        settings.PROFILING_SAMPLE_RATE = 1
+
+        with caplog.at_level(logging.INFO, logger='api.profiling'):
+            client.get('/api/v1/genres/')
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['path'] == '/api/v1/genres/' and record['status'] == 200 and 'db' in record['ms'], \
+            'Проверьте, что выборочные запросы записываются в журнал `api.profiling`'
+        assert 'Server-Timing' not in client.get('/api/v1/genres/'), \
+            'Проверьте, что выборочное профилирование не раскрывает `Server-Timing` клиентам'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_profile_param(self, client, user_client, settings, monkeypatch):
+        from api import profiling
+
+        settings.DEBUG = False
+        titles, _, _ = create_titles(user_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        profiles = []
+
+        class RecordedProfile(profiling.Profile):
+            def __init__(self):
+                super().__init__()
+                profiles.append(self)
+
+        monkeypatch.setattr(profiling, 'Profile', RecordedProfile)
+        client.get('/api/v1/titles/?profile=1')
+        client.get('/api/v1/titles/?profile=1', HTTP_AUTHORIZATION='Bearer invalid')
+        assert not profiles, \
+            'Проверьте, что `?profile=1` от анонимных пользователей не включает профилирование'
+
+        response = user_client.get(url)
+        profiled = user_client.get(f'{url}?profile=1')
+        assert len(profiles) == 1 and 'Server-Timing' in profiled, \
+            'Проверьте, что `?profile=1` профилирует запросы администратора'
+        assert profiled['ETag'] == response['ETag'], \
+            'Проверьте, что параметр `profile` не влияет на ETag'
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        user_client.get('/api/v1/genres/')
+        with CaptureQueriesContext(connection) as context:
+            user_client.get('/api/v1/genres/?profile=1')
+        assert not context.captured_queries, \
+            'Проверьте, что параметр `profile` не влияет на ключ кэша списков'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_anonymous_profile_with_debug(self, client, user_client, settings, monkeypatch):
+        from api import profiling
+
+        settings.DEBUG = True
+        settings.PROFILING_DEBUG_FIELD = True
+        create_titles(user_client)
+        profiles = []
+
+        class RecordedProfile(profiling.Profile):
+            def __init__(self):
+                super().__init__()
+                profiles.append(self)
+
+        monkeypatch.setattr(profiling, 'Profile', RecordedProfile)
+        response = client.get('/api/v1/genres/?profile=1')
+        assert not profiles and 'Server-Timing' not in response and '_profile' not in response.json(), \
+            'Проверьте, что при DEBUG анонимные запросы с `?profile=1` не профилируются'
+        assert 'Server-Timing' in user_client.get('/api/v1/genres/?profile=1'), \
+            'Проверьте, что при DEBUG администратор по-прежнему получает `Server-Timing`'
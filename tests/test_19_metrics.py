@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from api.metrics import MetricsRegistry, get_registry
+
+
+class Test19Metrics:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_metrics_endpoint(self, client, user_client):
+        get_registry().clear()
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/titles/100/')
+
+        response = client.get('/api/v1/metrics/')
+        assert response.status_code == 401, \
+            'Проверьте, что `/api/v1/metrics/` недоступен анонимным пользователям'
+        response = user_client.get('/api/v1/metrics/')
+        assert response.status_code == 200 and response['Content-Type'].startswith('text/plain'), \
+            'Проверьте, что администратор получает метрики в текстовом формате Prometheus'
+        text = response.content.decode()
+        for line in (
+            'yamdb_requests_total{method="GET",status="200",view="GenreViewSet.list"} 2.0',
+            'yamdb_requests_total{method="GET",status="404",view="TitleViewSet.retrieve"} 1.0',
+            'yamdb_request_duration_seconds_count{view="GenreViewSet.list"} 2',
+            'yamdb_db_queries_bucket{view="TitleViewSet.retrieve",le="+Inf"} 1',
+            'yamdb_cache_lookups_total{cache="list",result="hit",view="GenreViewSet.list"} 1.0',
+            'yamdb_cache_lookups_total{cache="list",result="miss",view="GenreViewSet.list"} 1.0',
+        ):
+            assert line in text, f'Проверьте, что метрики содержат строку `{line}`'
+
+    def test_02_multiprocess_aggregation(self, tmp_path):
+        labels = {'view': 'TitleViewSet.list'}
+        registry = MetricsRegistry(str(tmp_path))
+        registry.inc('yamdb_requests_total', labels)
+        registry.observe('yamdb_request_duration_seconds', labels, 0.02)
+        registry.flush(force=True)
+        # a snapshot left by another worker process
+        other = json.loads((tmp_path / registry.path().split('/')[-1]).read_text())
+        (tmp_path / '1.json').write_text(json.dumps(other))
+
+        text = registry.exposition()
+        assert 'yamdb_requests_total{view="TitleViewSet.list"} 2.0' in text, \
+            'Проверьте, что счётчики суммируются по всем процессам из общей директории'
+        assert 'yamdb_request_duration_seconds_bucket{view="TitleViewSet.list",le="0.025"} 2' in text \
+            and 'yamdb_request_duration_seconds_bucket{view="TitleViewSet.list",le="0.01"} 0' in text, \
+            'Проверьте, что гистограммы объединяются по процессам с накопительными корзинами'
+
+    def test_03_reused_pid(self, tmp_path):
+        labels = {'view': 'TitleViewSet.list'}
+        exited = MetricsRegistry(str(tmp_path))
+        exited.inc('yamdb_requests_total', labels)
+        exited.flush(force=True)
+        # a new worker that got the pid of the exited one
+        registry = MetricsRegistry(str(tmp_path))
+        registry.inc('yamdb_requests_total', labels)
+        registry.flush(force=True)
+        assert len(list(tmp_path.glob('*.json'))) == 2, \
+            'Проверьте, что процесс с повторно выданным pid не перезаписывает файл метрик завершившегося процесса'
+        assert 'yamdb_requests_total{view="TitleViewSet.list"} 2.0' in registry.exposition(), \
+            'Проверьте, что метрики завершившихся процессов остаются в суммах'
+
+        path = registry.path()
+        registry.forked()
+        assert registry.path() != path and not registry.snapshot()['counters'], \
+            'Проверьте, что процесс, порождённый через fork, начинает со своих пустых метрик и своего файла'
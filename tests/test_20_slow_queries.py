@@ -0,0 +1,87 @@
+import logging
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api import slow_queries
+
+from .common import create_titles
+
+
+class Test20SlowQueries:
+
+    def test_01_fingerprint(self):
+        first = slow_queries.normalize(
+            "SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x''y' LIMIT 21"
+        )
+        second = slow_queries.normalize("SELECT *  FROM t WHERE id IN (%s) AND name = 'z' LIMIT 10")
+        assert first == second == 'SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?', \
+            'Проверьте, что нормализация SQL убирает литералы и списки IN'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_capture_and_rank(self, client, user_client, settings, monkeypatch, tmp_path):
+        create_titles(user_client)
+        log = tmp_path / 'slow.log'
+        handler = logging.FileHandler(log)
+        monkeypatch.setattr(logging.getLogger('api.slow_queries'), 'handlers', [handler])
+        monkeypatch.setattr(slow_queries, 'explained', set())
+        settings.SLOW_QUERY_MS = 1e-6
+
+        client.get('/api/v1/titles/?genre=horror')
+        client.get('/api/v1/titles/?genre=comedy')
+        settings.SLOW_QUERY_MS = 0
+        handler.close()
+
+        out = StringIO()
+        call_command('slow_queries', log=str(log), plans=True, stdout=out)
+        report = out.getvalue()
+        assert 'TitleViewSet.list' in report, \
+            'Проверьте, что медленные запросы записываются вместе с представлением и действием'
+        assert 'count 2' in report, \
+            'Проверьте, что запросы с разными значениями параметров объединяются по отпечатку'
+        assert 'SCAN' in report or 'SEARCH' in report, \
+            'Проверьте, что для нового отпечатка сохраняется план EXPLAIN QUERY PLAN'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_explain_in_savepoint(self):
+        from django.db import connection, transaction
+        from django.test.utils import CaptureQueriesContext
+
+        from api.models import Category
+
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            Category.objects.create(name='Фильм', slug='films')
+            assert slow_queries.explain(connection, 'SELECT * FROM api_missing', ()) is None, \
+                'Проверьте, что ошибка EXPLAIN не выходит за пределы explain()'
+            assert Category.objects.count() == 1, \
+                'Проверьте, что ошибка EXPLAIN не прерывает транзакцию запроса'
+        statements = [query['sql'] for query in queries.captured_queries]
+        assert any(sql.startswith('ROLLBACK TO SAVEPOINT') for sql in statements), \
+            'Проверьте, что EXPLAIN выполняется в точке сохранения транзакции'
+        assert Category.objects.count() == 1, \
+            'Проверьте, что ошибка EXPLAIN не откатывает транзакцию запроса'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_statements_are_opt_in(self, client, settings, monkeypatch, tmp_path):
+        import json
+
+        from api.models import User
+
+        User.objects.create_user('reader', 'reader@yamdb.fake')
+        log = tmp_path / 'slow.log'
+        handler = logging.FileHandler(log)
+        monkeypatch.setattr(logging.getLogger('api.slow_queries'), 'handlers', [handler])
+        settings.SLOW_QUERY_MS = 1e-6
+
+        User.objects.filter(email='reader@yamdb.fake').exists()
+        settings.SLOW_QUERY_STATEMENTS = True
+        User.objects.filter(email='reader@yamdb.fake').exists()
+        settings.SLOW_QUERY_MS = 0
+        handler.close()
+
+        first, second = [json.loads(line) for line in log.read_text().splitlines()]
+        assert 'statement' not in first and 'reader@yamdb.fake' not in json.dumps(first), \
+            'Проверьте, что значения параметров запросов не пишутся в журнал по умолчанию'
+        assert 'reader@yamdb.fake' in second['statement'], \
+            'Проверьте, что при SLOW_QUERY_STATEMENTS запросы пишутся в журнал со значениями'
@@ -0,0 +1,45 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+
+from api.index_advisor import logged_workload
+from api.models import User
+
+
+class Test21IndexAdvisor:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_advise_indexes(self):
+        call_command('generate_dataset', scale=2, stdout=StringIO())
+        User.objects.create_superuser('advisor', 'advisor@yamdb.fake', role=User.Role.ADMIN)
+
+        cache.set('shared', 'kept')
+        out = StringIO()
+        call_command('advise_indexes', in_place=True, repeat=1, min_benefit=-1, dry_run=True, stdout=out)
+        report = out.getvalue()
+        assert 'api_title (year)' in report, \
+            'Проверьте, что `advise_indexes` предлагает индекс для фильтра по `year`'
+        assert 'migrations.AddIndex' in report and "fields=['year']" in report, \
+            'Проверьте, что `advise_indexes` формирует миграцию с предложенными индексами'
+        assert cache.get('shared') == 'kept', \
+            'Проверьте, что `advise_indexes` не очищает общий кэш и не пишет в него'
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, 'api_title')
+        assert not any(constraint['columns'] == ['year'] for constraint in constraints.values()), \
+            'Проверьте, что пробные индексы откатываются после измерения'
+
+    def test_02_logged_workload(self, tmp_path):
+        log = tmp_path / 'slow.log'
+        records = [
+            {'statement': 'SELECT * FROM "api_title" WHERE "api_title"."year" = 1994'},
+            {'statement': 'SELECT * FROM "api_title" WHERE "api_title"."year" = 1994'},
+            {'statement': 'UPDATE "api_title" SET "rating_sum" = 1'},
+            {'fingerprint': 'executemany without a statement'},
+        ]
+        log.write_text('\n'.join(map(json.dumps, records)) + '\nnot json\n')
+        assert logged_workload(str(log)) == [records[0]['statement']], \
+            'Проверьте, что из журнала медленных запросов воспроизводятся только различные SELECT'
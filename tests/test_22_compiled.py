@@ -0,0 +1,80 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.benchmarks import serializer_benchmarks
+from api.models import Comment, Title
+from api.views import CommentViewSet, ReviewViewSet, TitleViewSet
+
+from .common import count_queries, create_comments
+
+
+def responses(client, urls, monkeypatch):
+    """Bodies of `urls` with compiled reads, then with the serializers."""
+    compiled = [client.get(url) for url in urls]
+    for viewset in (TitleViewSet, ReviewViewSet, CommentViewSet):
+        monkeypatch.setattr(viewset, 'compiled_reads', False)
+    regular = [client.get(url) for url in urls]
+    return compiled, regular
+
+
+def assert_identical(client, urls, monkeypatch):
+    compiled, regular = responses(client, urls, monkeypatch)
+    for url, fast, slow in zip(urls, compiled, regular):
+        assert fast.status_code == slow.status_code == 200, \
+            f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+        assert fast.content == slow.content, \
+            f'Проверьте, что ответ `{url}` при compiled_reads совпадает с ответом сериализатора побайтно'
+
+
+class Test22CompiledReads:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_identical_responses(self, client, user_client, admin, monkeypatch):
+        _, reviews, titles, _, _ = create_comments(user_client, admin)
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        comment_id = Comment.objects.filter(review_id=review_id).first().id
+        urls = [
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{titles[1]["id"]}/',
+            '/api/v1/titles/?genre=horror',
+            '/api/v1/titles/?pagination=cursor',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/',
+            f'/api/v1/titles/{title_id}/reviews/?pagination=cursor',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/{comment_id}/',
+        ]
+        assert_identical(client, urls, monkeypatch)
+        assert client.get('/api/v1/titles/0/').status_code == 404, \
+            'Проверьте, что при GET запросе несуществующего произведения возвращается статус 404'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_generated_dataset(self, client, monkeypatch):
+        call_command('generate_dataset', scale=1, stdout=StringIO())
+        title_id = Title.objects.order_by('-rating_count').first().id
+        review = Comment.objects.select_related('review').first().review
+        review_id = review.id
+        queries = count_queries(client, '/api/v1/titles/?page=2')
+        urls = [
+            '/api/v1/titles/?page=2',
+            '/api/v1/titles/?name=the',
+            '/api/v1/titles/?year=1994',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{review.title_id}/reviews/{review_id}/comments/',
+        ]
+        assert_identical(client, urls, monkeypatch)
+        assert count_queries(client, '/api/v1/titles/?page=2') == queries, \
+            'Проверьте, что compiled_reads не увеличивает число SQL-запросов списка произведений'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_benchmark(self):
+        call_command('generate_dataset', scale=1, stdout=StringIO())
+        results = serializer_benchmarks(rows=20, repeat=2)
+        assert set(results) == {'TitleReadSerializer', 'ReviewSerializer', 'CommentSerializer'}, \
+            'Проверьте, что бенчмарк сравнивает все сериализаторы чтения'
+        assert all(stats['drf_us_per_row'] > 0 and stats['compiled_us_per_row'] > 0
+                   for stats in results.values()), \
+            'Проверьте, что бенчмарк записывает время CPU на строку для обоих вариантов'
@@ -0,0 +1,105 @@
+import datetime
+import decimal
+import uuid
+from collections import OrderedDict
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+from api.benchmarks import clients, pick_client, router_cases, sample_objects
+from api.models import User
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+PAYLOAD = OrderedDict([
+    ('aware', timezone.now()),
+    ('naive', datetime.datetime(2020, 5, 17, 12, 30, 1, 123456)),
+    ('date', datetime.date(2020, 5, 17)),
+    ('time', datetime.time(23, 59, 1, 5)),
+    ('delta', datetime.timedelta(hours=1, microseconds=5)),
+    ('decimal', decimal.Decimal('7.25')),
+    ('lazy', gettext_lazy('This field is required.')),
+    ('uuid', uuid.UUID('12345678-1234-5678-1234-567812345678')),
+    ('text', 'Кириллица, "кавычки", \\ и \u2028\u2029'),
+    ('numbers', (0, -1, 2 ** 63, 0.1, 7.5, None, True, False)),
+    ('nested', [{'id': 1, 'genre': []}, OrderedDict(slug='drama')]),
+    (1, 'int key'),
+])
+
+
+def render(renderer, data, media_type=None):
+    return renderer.render(data, media_type, {})
+
+
+class Test23FastJSON:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_every_endpoint(self):
+        call_command('generate_dataset', scale=1, stdout=StringIO())
+        admin = User.objects.create_superuser('json', 'json@yamdb.fake', role=User.Role.ADMIN)
+        anonymous, admin_client = clients(admin)
+        samples = sample_objects(admin)
+        urls = [case.url for case in router_cases(samples)] + [
+            '/api/v1/leaderboards/top-rated/', '/api/v1/titles/0/',
+            '/api/v1/titles/?pagination=cursor', '/api/v1/users/me/?format=json',
+        ]
+        for case in router_cases(samples):
+            client = pick_client(case, anonymous, admin_client)
+            response = client.get(case.url)
+            assert response.status_code == 200, \
+                f'Проверьте, что при GET запросе `{case.url}` возвращается статус 200'
+        for url in urls:
+            for client in (anonymous, admin_client):
+                response = client.get(url)
+                assert isinstance(response.accepted_renderer, FastJSONRenderer), \
+                    f'Проверьте, что ответ `{url}` формируется `FastJSONRenderer`'
+                expected = JSONRenderer().render(
+                    response.data, response.accepted_media_type, response.renderer_context
+                )
+                assert response.content == expected, \
+                    f'Проверьте, что ответ `{url}` совпадает с ответом `JSONRenderer` побайтно'
+
+        response = admin_client.post('/api/v1/genres/', data={'name': 'Нуар', 'slug': 'noir'}, format='json')
+        assert response.status_code == 201, \
+            'Проверьте, что POST запрос с телом JSON разбирается `FastJSONParser`'
+        response = admin_client.post('/api/v1/titles/', data={'name': 'x'}, format='json')
+        assert response.status_code == 400 and response.content == JSONRenderer().render(
+            response.data, response.accepted_media_type, response.renderer_context
+        ), 'Проверьте, что ошибки валидации совпадают с ответом `JSONRenderer` побайтно'
+
+    def test_02_renderer_parity(self, monkeypatch):
+        fast, stdlib = FastJSONRenderer(), JSONRenderer()
+        for data in (PAYLOAD, [PAYLOAD], {'big': 2 ** 64}, None, [], 'строка'):
+            assert render(fast, data) == render(stdlib, data), \
+                'Проверьте, что `FastJSONRenderer` кодирует даты, Decimal, ленивые строки и числа как `JSONRenderer`'
+        media_type = 'application/json; indent=4'
+        assert render(fast, PAYLOAD, media_type) == render(stdlib, PAYLOAD, media_type), \
+            'Проверьте, что отступы из `Accept` обрабатываются как в `JSONRenderer`'
+        with pytest.raises(ValueError):
+            render(fast, {'time': datetime.time(1, tzinfo=datetime.timezone.utc)})
+
+        monkeypatch.setattr(renderers, 'orjson', None)
+        assert render(fast, PAYLOAD) == render(stdlib, PAYLOAD), \
+            'Проверьте, что без orjson `FastJSONRenderer` использует модуль json'
+
+    def test_03_parser_parity(self):
+        fast, stdlib = FastJSONParser(), JSONParser()
+        bodies = [
+            render(JSONRenderer(), PAYLOAD),
+            b'{"id": 12345678901234567890123, "score": 1e400}',
+            '{"text": "\u2028 \u2713"}'.encode(),
+            b'[1, 2.5, null, true]',
+        ]
+        for body in bodies:
+            assert fast.parse(BytesIO(body)) == stdlib.parse(BytesIO(body)), \
+                'Проверьте, что `FastJSONParser` разбирает JSON так же, как `JSONParser`'
+        for body in (b'{"a": ', b'NaN', b'{"a": Infinity}', b''):
+            with pytest.raises(ParseError):
+                fast.parse(BytesIO(body))
@@ -0,0 +1,82 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.views import CommentViewSet, ReviewViewSet, TitleViewSet
+
+from .common import create_comments
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, \
+        f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+    return response, ' '.join(query['sql'] for query in context.captured_queries)
+
+
+def check_sparse(client, title_id, review_id):
+    response, sql = get(client, '/api/v1/titles/?fields=id,name,rating')
+    assert [list(title) for title in response.json()['results']] == [['id', 'name', 'rating']] * 2, \
+        'Проверьте, что `?fields=` оставляет в ответе только запрошенные поля в порядке сериализатора'
+    assert 'api_category' not in sql and 'api_genre' not in sql and 'description' not in sql, \
+        'Проверьте, что `?fields=` убирает лишние JOIN, предзагрузку жанров и неиспользуемые колонки'
+
+    response, sql = get(client, f'/api/v1/titles/{title_id}/?fields=genre')
+    assert list(response.json()) == ['genre'] and len(response.json()['genre']) == 2, \
+        'Проверьте, что `?fields=` работает для детальной страницы произведения'
+    assert 'api_category' not in sql and 'description' not in sql, \
+        'Проверьте, что `?fields=` убирает лишние колонки детальной страницы'
+
+    response, sql = get(client, f'/api/v1/titles/{title_id}/reviews/?fields=id,score&pagination=cursor')
+    assert all(list(review) == ['id', 'score'] for review in response.json()['results']), \
+        'Проверьте, что `?fields=` работает для отзывов вместе с курсорной пагинацией'
+    assert 'api_user' not in sql and '"text"' not in sql, \
+        'Проверьте, что `?fields=` убирает JOIN с авторами отзывов'
+
+    url = f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/?fields=author'
+    response, sql = get(client, url)
+    assert all(list(comment) == ['author'] for comment in response.json()['results']), \
+        'Проверьте, что `?fields=` работает для комментариев'
+    assert '"text"' not in sql, \
+        'Проверьте, что `?fields=` не загружает текст комментариев, если он не запрошен'
+
+
+class Test24SparseFieldsets:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_compiled_reads(self, client, user_client, admin):
+        _, reviews, titles, _, _ = create_comments(user_client, admin)
+        check_sparse(client, titles[0]['id'], reviews[0]['id'])
+        full = client.get('/api/v1/titles/').content
+        assert len(client.get('/api/v1/titles/?fields=id,name,rating').content) < len(full), \
+            'Проверьте, что `?fields=` уменьшает размер ответа'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_serializers(self, client, user_client, admin, monkeypatch):
+        _, reviews, titles, _, _ = create_comments(user_client, admin)
+        for viewset in (TitleViewSet, ReviewViewSet, CommentViewSet):
+            monkeypatch.setattr(viewset, 'compiled_reads', False)
+        check_sparse(client, titles[0]['id'], reviews[0]['id'])
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_users_and_errors(self, client, user_client, admin):
+        response, sql = get(user_client, '/api/v1/users/?fields=username,role')
+        assert all(list(user) == ['username', 'role'] for user in response.json()['results']), \
+            'Проверьте, что `?fields=` работает для пользователей'
+        assert '"bio"' not in sql and '"email"' not in sql, \
+            'Проверьте, что `?fields=` не загружает неиспользуемые колонки пользователей'
+        response, _ = get(user_client, f'/api/v1/users/{admin.username}/?fields=email')
+        assert response.json() == {'email': admin.email}, \
+            'Проверьте, что `?fields=` работает для детальной страницы пользователя'
+        response, _ = get(user_client, '/api/v1/users/me/?fields=username')
+        assert response.json() == {'username': admin.username}, \
+            'Проверьте, что `?fields=` работает для `/api/v1/users/me/`'
+
+        response = client.get('/api/v1/titles/?fields=id,password')
+        assert response.status_code == 400 and 'fields' in response.json(), \
+            'Проверьте, что при запросе неизвестных полей в `?fields=` возвращается статус 400'
+        for url in ('/api/v1/titles/?fields=,', '/api/v1/titles/?fields=%20,%20'):
+            response = client.get(url)
+            assert response.status_code == 400 and 'fields' in response.json(), \
+                'Проверьте, что при пустом списке полей в `?fields=` возвращается статус 400'